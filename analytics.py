@@ -0,0 +1,176 @@
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from results import answerOutcomes, readResult
+from session import writeFileAtomic
+from settings import *
+
+
+def storeRows(outcomes):
+    # 只保留有题目 id 的记录：题目 id、是否正确、分值
+    return [(str(id), correct, float(weight)) for id, correct, weight in outcomes if id is not None]
+
+
+def readOutcomes(path):
+    try:
+        return storeRows(answerOutcomes(readResult(path).get('answers', [])))
+    except (OSError, ValueError, AttributeError, TypeError):
+        return []
+
+
+class QuestionStats:
+    def __init__(self, questions, attempts, passRate, meanScore):
+        # 末尾追加一项空统计，题库中没有作答记录的 id 统一映射到该项
+        self.lookup = {id: code for code, id in enumerate(questions)}
+        self.attempts = np.append(attempts, 0)
+        self.passRate = np.append(passRate, np.nan)
+        self.meanScore = np.append(meanScore, np.nan)
+
+    def columns(self, ids):
+        missing = len(self.attempts) - 1
+        codes = np.fromiter((self.lookup.get(str(id), missing) for id in ids), dtype=np.int64, count=len(ids))
+        return self.attempts[codes], self.passRate[codes], self.meanScore[codes]
+
+    def displayColumns(self, ids):
+        attempts, passRate, meanScore = self.columns(ids)
+        answered = attempts > 0
+        return [
+            ('通过率', [f'{value:.0%}' if known else '' for value, known in zip(passRate.tolist(), answered)]),
+            ('作答次数', [str(value) for value in attempts.tolist()]),
+            ('平均得分', [f'{value:.1f}' if known else '' for value, known in zip(meanScore.tolist(), answered)])
+        ]
+
+
+# 作答记录的列式存储，每行为 (文件, 题目, 是否正确, 分值)，按文件大小和修改时间增量更新
+class AnswerStore:
+    def __init__(self, path=ANSWER_STORE):
+        self.path = path
+        self.files = []
+        self.fileStats = np.zeros((0, 2), dtype=np.int64)
+        self.questions = []
+        self.fileCodes = np.zeros(0, dtype=np.int32)
+        self.questionCodes = np.zeros(0, dtype=np.int32)
+        self.correct = np.zeros(0, dtype=bool)
+        self.scores = np.zeros(0, dtype=np.float32)
+        self.load()
+
+    def load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                files = data['files'].tolist()
+                fileStats = data['fileStats']
+                questions = data['questions'].tolist()
+                fileCodes = data['fileCodes']
+                questionCodes = data['questionCodes']
+                correct = data['correct']
+                scores = data['scores']
+        except (OSError, ValueError, KeyError):
+            return
+        self.files, self.fileStats, self.questions = files, fileStats, questions
+        self.fileCodes, self.questionCodes, self.correct, self.scores = fileCodes, questionCodes, correct, scores
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        buffer = io.BytesIO()
+        np.savez(buffer, files=np.array(self.files, dtype=str), fileStats=self.fileStats,
+                 questions=np.array(self.questions, dtype=str), fileCodes=self.fileCodes,
+                 questionCodes=self.questionCodes, correct=self.correct, scores=self.scores)
+        writeFileAtomic(self.path, buffer.getvalue())
+
+    def update(self, folder, workers=None, outcomes=None):
+        # outcomes 为 ResultIndex.update 收集的 {文件: (大小和修改时间, 作答结果)}，文件未再变化时直接复用
+        known = {path: tuple(stat) for path, stat in zip(self.files, self.fileStats.tolist())}
+        current = {}
+        for entry in os.scandir(folder):
+            if entry.is_file() and entry.name.lower().endswith('.json'):
+                stat = entry.stat()
+                current[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        changed = sorted(path for path, stat in current.items() if known.get(path) != stat)
+        removed = [path for path in known if path not in current]
+        if not changed and not removed:
+            return 0, 0
+
+        # 删除改动和已删除文件的旧记录，文件编号重新压缩
+        keepFile = np.array([path in current and path not in changed for path in self.files], dtype=bool)
+        keepRow = keepFile[self.fileCodes] if len(self.fileCodes) else np.zeros(0, dtype=bool)
+        remap = np.cumsum(keepFile, dtype=np.int64) - 1
+        fileCodes = [remap[self.fileCodes[keepRow]].astype(np.int32)]
+        questionCodes = [self.questionCodes[keepRow]]
+        correct = [self.correct[keepRow]]
+        scores = [self.scores[keepRow]]
+        self.files = [path for path, keep in zip(self.files, keepFile) if keep]
+        self.fileStats = self.fileStats[keepFile]
+
+        parsed = {}
+        for path in changed:
+            if outcomes is not None and path in outcomes and outcomes[path][0] == current[path]:
+                parsed[path] = storeRows(outcomes[path][1])
+        pending = [path for path in changed if path not in parsed]
+
+        # 需要解析的文件较多时（首次建立）并行解析
+        if len(pending) > 64:
+            chunksize = max(1, len(pending) // ((workers or os.cpu_count() or 1) * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parsed.update(zip(pending, pool.map(readOutcomes, pending, chunksize=chunksize)))
+        else:
+            parsed.update((path, readOutcomes(path)) for path in pending)
+
+        lookup = {id: code for code, id in enumerate(self.questions)}
+        for path in changed:
+            rows = parsed[path]
+            code = len(self.files)
+            self.files.append(path)
+            codes = []
+            for id, _, _ in rows:
+                if id not in lookup:
+                    lookup[id] = len(self.questions)
+                    self.questions.append(id)
+                codes.append(lookup[id])
+            fileCodes.append(np.full(len(rows), code, dtype=np.int32))
+            questionCodes.append(np.array(codes, dtype=np.int32))
+            correct.append(np.array([row[1] for row in rows], dtype=bool))
+            scores.append(np.array([row[2] for row in rows], dtype=np.float32))
+        self.fileStats = np.concatenate([self.fileStats, np.array([current[path] for path in changed],
+                                                                  dtype=np.int64).reshape(-1, 2)])
+        self.fileCodes = np.concatenate(fileCodes)
+        self.questionCodes = np.concatenate(questionCodes)
+        self.correct = np.concatenate(correct)
+        self.scores = np.concatenate(scores)
+        return len(changed), len(removed)
+
+    def questionStats(self):
+        count = len(self.questions)
+        attempts = np.bincount(self.questionCodes, minlength=count)
+        passed = np.bincount(self.questionCodes, weights=self.correct, minlength=count)
+        earned = np.bincount(self.questionCodes, weights=self.scores * self.correct, minlength=count)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            passRate = passed / attempts
+            meanScore = earned / attempts
+        return QuestionStats(self.questions, attempts, passRate, meanScore)
+
+
+def updateStats(folder=RESULT_FOLDER, path=ANSWER_STORE, outcomes=None):
+    store = AnswerStore(path)
+    changed, removed = store.update(folder, outcomes=outcomes)
+    if changed or removed:
+        store.save()
+    return store.questionStats()
+
+
+if __name__ == '__main__':
+    import sys
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else RESULT_FOLDER
+    start = time.perf_counter()
+    store = AnswerStore()
+    changed, removed = store.update(folder)
+    store.save()
+    updated = time.perf_counter()
+    stats = store.questionStats()
+    done = time.perf_counter()
+    print(f'解析 {changed} 个文件，删除 {removed} 个，用时 {updated - start:.2f} 秒')
+    print(f'共 {len(store.correct)} 条作答、{len(store.questions)} 道题，统计用时 {(done - updated) * 1000:.1f} ms')
@@ -0,0 +1,316 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+import tracing
+from questionindex import LevelIndex
+from session import writeFileAtomic
+from settings import *
+
+# 界面和导出实际用到的列，其余列在读取时直接丢弃
+KEEP_COLUMNS = ('id', 'Question', 'Content')
+# 解析结果格式变化时递增，使旧缓存失效
+BANK_FORMAT = 3
+
+
+def processSheets(sheets):
+    for name, df in sheets.items():
+        df['id'] = df['id'].ffill()
+        if 'Question' in df.columns:
+            df = (
+                df.groupby('id', as_index=False)
+                .agg({
+                    'Question': ' '.join
+                })
+            )
+
+        df.insert(0, 'required', True)
+        df.insert(1, 'score', DEFAULT_SCORE)
+        sheets[name] = df
+    return sheets
+
+
+def sameContent(old, new):
+    # 比较除勾选和分值以外的列
+    return list(old.columns) == list(new.columns) and old.iloc[:, 2:].equals(new.iloc[:, 2:])
+
+
+def rowKeys(ids):
+    # 行的对齐键为 (id 的文本, 该 id 第几次出现)，同一 id 的多行（Content 表中向下填充的 id）按出现顺序分别对齐
+    import pandas as pd
+
+    ids = pd.Series([str(value) for value in ids], dtype=object)
+    return pd.MultiIndex.from_arrays([ids, ids.groupby(ids, sort=False).cumcount()])
+
+
+def mergeSheets(oldSheets, newSheets):
+    # 未改动的工作表保留原对象；改动的工作表按 (id, 出现次序) 沿用原有的勾选和分值
+    merged = {}
+    changed = []
+    for name, df in newSheets.items():
+        old = oldSheets.get(name) if oldSheets is not None else None
+        if old is not None and sameContent(old, df):
+            merged[name] = old
+            continue
+        if old is not None and 'id' in old.columns and 'id' in df.columns:
+            positions = rowKeys(old['id'].tolist()).get_indexer(rowKeys(df['id'].tolist()))
+            known = positions >= 0
+            df.loc[known, 'required'] = old['required'].to_numpy(dtype=bool)[positions[known]]
+            df.loc[known, 'score'] = old['score'].to_numpy()[positions[known]].astype(df['score'].dtype)
+        merged[name] = df
+        changed.append(name)
+    return merged, changed
+
+
+# 缺失值与 pandas.read_excel 一致使用 NaN，导出和显示均为 'nan'
+MISSING = float('nan')
+
+
+def convertCell(value):
+    # 与 pandas.read_excel 一致：整数值的浮点数按整数处理，文本驻留以共享重复的字符串
+    if value is None:
+        return MISSING
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def readSheet(rows):
+    # 单遍完成列投影、id 向下填充和 Question 多行合并
+    import pandas as pd
+
+    header = next(rows, ())
+    columns = {}
+    for index, name in enumerate(header):
+        if name in KEEP_COLUMNS and name not in columns:
+            columns[name] = index
+    idIndex = columns.get('id')
+    questionIndex = columns.get('Question')
+    currentId = MISSING
+    groups = {}
+    values = {name: [] for name in columns if name != 'id'}
+    ids = []
+    # 与 read_excel 一致：中间的空行保留（id 向下填充），末尾的空行丢弃
+    blankRows = 0
+
+    for row in rows:
+        if all(value is None for value in row):
+            blankRows += 1
+            continue
+        if idIndex is not None and idIndex < len(row) and row[idIndex] is not None:
+            currentId = sys.intern(str(convertCell(row[idIndex])))
+        if questionIndex is not None:
+            # 首个 id 之前的行与 groupby 一致被丢弃，空白的 Question 单元格跳过
+            if currentId is MISSING:
+                continue
+            part = row[questionIndex] if questionIndex < len(row) else None
+            parts = groups.setdefault(currentId, [])
+            if part is not None:
+                parts.append(str(convertCell(part)))
+            continue
+        if blankRows:
+            ids.extend([ids[-1] if ids else MISSING] * blankRows)
+            for cells in values.values():
+                cells.extend([MISSING] * blankRows)
+            blankRows = 0
+        ids.append(currentId)
+        for name, cells in values.items():
+            index = columns[name]
+            cells.append(convertCell(row[index]) if index < len(row) else MISSING)
+
+    if questionIndex is not None:
+        # 与 groupby 一致，按 id 排序
+        ids = sorted(groups)
+        data = {'id': ids, 'Question': [sys.intern(' '.join(groups[id])) for id in ids]}
+    else:
+        values['id'] = ids
+        data = {name: values[name] for name in sorted(values, key=lambda name: columns.get(name, -1))}
+    df = pd.DataFrame({name: pd.Series(cells, dtype=object) for name, cells in data.items()})
+    df.insert(0, 'required', True)
+    df.insert(1, 'score', DEFAULT_SCORE)
+    return df
+
+
+def readLevel(path):
+    # 只读模式逐行读取，不把整张工作表载入内存
+    import openpyxl
+
+    with tracing.span('parseWorkbook', file=os.path.basename(path)) as span:
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheets = {worksheet.title: readSheet(worksheet.iter_rows(values_only=True))
+                      for worksheet in workbook.worksheets}
+        finally:
+            workbook.close()
+        span.set(sheets=len(sheets), rows=sum(len(df) for df in sheets.values()))
+    return sheets
+
+
+def readLevelFull(path):
+    # 原先的整表读取方式，仅用于内存对比
+    import pandas as pd
+
+    return processSheets(pd.read_excel(path, sheet_name=None, dtype={'id': str}))
+
+
+def retainedMemory(reader, path):
+    # tracemalloc 实测：解析结果仍被持有时新增的堆内存，以及解析过程中的峰值
+    import gc
+    import tracemalloc
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        sheets = reader(path)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del sheets
+    return current - base, peak - base
+
+
+def memoryReport(excels):
+    # 统计的是 Python 和 numpy 分配的堆内存，不是进程 RSS
+    excels = [(level, excel) for level, excel in enumerate(excels, 1) if os.path.exists(excel)]
+    if not excels:
+        return []
+    # 先各解析一次，避免把首次导入模块的内存算进第一个关卡
+    readLevelFull(excels[0][1])
+    readLevel(excels[0][1])
+    lines = ['解析结果占用的堆内存（tracemalloc 实测，未统计 RSS）：']
+    for level, excel in excels:
+        before, beforePeak = retainedMemory(readLevelFull, excel)
+        after, afterPeak = retainedMemory(readLevel, excel)
+        lines.append(f'关卡 {level}：{before / 1024:.0f} KB -> {after / 1024:.0f} KB，'
+                     f'解析峰值 {beforePeak / 1024:.0f} KB -> {afterPeak / 1024:.0f} KB')
+    return lines
+
+
+def workbookStat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def fileDigest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 题库解析结果的二进制缓存，按工作簿路径、大小、修改时间和内容哈希判断是否需要重新解析 Excel
+class BankCache:
+    def __init__(self, folder=CACHE_FOLDER):
+        self.folder = folder
+        self.hits = 0
+        self.misses = 0
+
+    def entryPath(self, path):
+        key = hashlib.sha1(os.path.abspath(path).encode('UTF-8')).hexdigest()
+        return os.path.join(self.folder, key)
+
+    def load(self, path):
+        stat = os.stat(path)
+        entry = self.entryPath(path)
+        meta = self.readMeta(entry)
+
+        if meta is not None and meta.get('format') == BANK_FORMAT and os.path.exists(entry + '.pkl'):
+            if meta['size'] == stat.st_size and meta['mtime'] == stat.st_mtime_ns:
+                sheets = self.readSheets(entry)
+                if sheets is not None:
+                    self.hits += 1
+                    return sheets
+            else:
+                digest = fileDigest(path)
+                if meta['hash'] == digest:
+                    sheets = self.readSheets(entry)
+                    if sheets is not None:
+                        self.writeMeta(entry, path, stat, digest)
+                        self.hits += 1
+                        return sheets
+
+        self.misses += 1
+        digest = fileDigest(path)
+        sheets = readLevel(path)
+        self.store(entry, path, stat, digest, sheets)
+        return sheets
+
+    def readMeta(self, entry):
+        try:
+            with open(entry + '.json', 'r', encoding='UTF-8') as metaFile:
+                return json.load(metaFile)
+        except (OSError, ValueError):
+            return None
+
+    def readSheets(self, entry):
+        try:
+            with open(entry + '.pkl', 'rb') as dataFile:
+                return pickle.load(dataFile)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+    def writeMeta(self, entry, path, stat, digest):
+        meta = {
+            'path': os.path.abspath(path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'hash': digest,
+            'format': BANK_FORMAT
+        }
+        writeFileAtomic(entry + '.json', json.dumps(meta).encode('UTF-8'))
+
+    def store(self, entry, path, stat, digest, sheets):
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            writeFileAtomic(entry + '.pkl', pickle.dumps(sheets, protocol=pickle.HIGHEST_PROTOCOL))
+            self.writeMeta(entry, path, stat, digest)
+        except OSError:
+            # 缓存写入失败不影响本次加载
+            pass
+
+    def invalidate(self, path=None):
+        if path is not None:
+            entries = [self.entryPath(path)]
+        elif os.path.isdir(self.folder):
+            entries = {os.path.join(self.folder, name.split('.')[0]) for name in os.listdir(self.folder)}
+        else:
+            entries = []
+        for entry in entries:
+            for suffix in ('.json', '.pkl'):
+                if os.path.exists(entry + suffix):
+                    os.remove(entry + suffix)
+
+    def report(self):
+        return f'题库缓存：命中 {self.hits}，未命中 {self.misses}'
+
+
+# 供进程池调用，返回解析结果、本次是否命中缓存以及该关卡的题目索引
+def loadLevelJob(path, folder=CACHE_FOLDER, level=None):
+    cache = BankCache(folder)
+    sheets = cache.load(path)
+    return sheets, cache.hits, LevelIndex(level, sheets)
+
+
+if __name__ == '__main__':
+    cache = BankCache()
+    excels = (LEVEL_1_EXCEL, LEVEL_2_EXCEL, LEVEL_3_EXCEL, LEVEL_4_EXCEL)
+    if '--clear' in sys.argv:
+        cache.invalidate()
+    elif '--memory' in sys.argv:
+        for line in memoryReport(excels):
+            print(line)
+    else:
+        for excel in excels:
+            if os.path.exists(excel):
+                cache.load(excel)
+        print(cache.report())
@@ -0,0 +1,113 @@
+import argparse
+import csv
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from session import DEFAULT_SETTINGS, TIME_PRESETS, WEATHERS, encodeTime, questionRows, writeSession
+from settings import *
+
+
+def parseTime(text):
+    text = text.strip()
+    if text in TIME_PRESETS:
+        return encodeTime(*TIME_PRESETS[text])
+    hour, minute = text.split(':')
+    return encodeTime(int(hour), int(minute))
+
+
+def parseWeather(text):
+    text = text.strip()
+    if text in WEATHERS:
+        return WEATHERS.index(text)
+    return int(text)
+
+
+def parseValue(key, text):
+    if isinstance(DEFAULT_SETTINGS[key], bool):
+        return text.strip().lower() in ('1', 'true', 'yes', 'y', '是')
+    return int(text)
+
+
+def readRoster(path):
+    # 名单为 CSV，必须有 name 列；time、weather、minutes、seconds、duration 以及 settings.yaml 中的各项可选
+    trainees = []
+    with open(path, 'r', encoding='UTF-8-sig', newline='') as csvFile:
+        for row in csv.DictReader(csvFile):
+            row = {key.strip(): value for key, value in row.items() if key and value not in (None, '')}
+            if 'name' not in row:
+                continue
+            trainee = {
+                'name': row['name'].strip(),
+                'time': parseTime(row.get('time', '黎明')),
+                'weather': parseWeather(row.get('weather', '0')),
+                'data': dict(DEFAULT_SETTINGS)
+            }
+            if 'duration' in row:
+                trainee['trainTime'] = int(row['duration'])
+            else:
+                trainee['trainTime'] = int(row.get('minutes', 0)) * 60 + int(row.get('seconds', 0))
+            for key in DEFAULT_SETTINGS:
+                if key in row:
+                    trainee['data'][key] = parseValue(key, row[key])
+            trainees.append(trainee)
+    return trainees
+
+
+def folderNames(trainees):
+    names = []
+    used = set()
+    for trainee in trainees:
+        base = re.sub(r'[<>:"/\\|?*\s]+', '_', trainee['name']).strip('._') or 'trainee'
+        name = base
+        suffix = 2
+        while name in used:
+            name = f'{base}_{suffix}'
+            suffix += 1
+        used.add(name)
+        names.append(name)
+    return names
+
+
+def generate(roster, output, levels, workers=None, perSheet=None, seed=0):
+    trainees = readRoster(roster)
+    folders = [os.path.join(output, name) for name in folderNames(trainees)]
+    # 指定每表题数时每位学员按名单顺序分到不同的一套随机题目，否则都使用当前勾选
+    if perSheet:
+        from variants import VariantSet
+
+        variants = VariantSet(levels, perSheet, seed)
+        rowsList = [variants.rows(index) for index in range(len(trainees))]
+    else:
+        rowsList = [questionRows(levels)] * len(trainees)
+
+    def work(trainee, folder, rows):
+        os.makedirs(folder, exist_ok=True)
+        writeSession(folder, trainee['time'], trainee['weather'], trainee['trainTime'],
+                     trainee['name'], trainee['data'], rows)
+        return folder
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        written = list(pool.map(work, trainees, folders, rowsList))
+    return written, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    from bank import BankCache
+
+    parser = argparse.ArgumentParser(description='根据学员名单批量生成训练配置')
+    parser.add_argument('roster', help='学员名单 CSV')
+    parser.add_argument('-o', '--output', default='sessions')
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    parser.add_argument('-k', '--per-sheet', type=int, default=None, help='每位学员每个工作表随机抽取的题数')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('--levels', nargs=4, metavar='EXCEL',
+                        default=[LEVEL_1_EXCEL, LEVEL_2_EXCEL, LEVEL_3_EXCEL, LEVEL_4_EXCEL])
+    args = parser.parse_args()
+
+    cache = BankCache()
+    levels = [cache.load(excel) if os.path.exists(excel) else None for excel in args.levels]
+    written, elapsed = generate(args.roster, args.output, levels, args.jobs, args.per_sheet, args.seed)
+    print(f'已生成 {len(written)} 份训练配置到 {args.output}，用时 {elapsed:.2f} 秒')
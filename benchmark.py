@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+ANSWER_TYPES = ['SingleChoice', 'MultipleChoice', 'SceneTraining', 'TrueFalse']
+
+
+def makeWorkbook(path, level, sheets, rows, group, seed=0):
+    # 偶数工作表为多行合并的 Question 题目，奇数工作表为 Content 题目
+    import pandas as pd
+
+    rng = random.Random(seed)
+    with pd.ExcelWriter(path) as writer:
+        for sheet in range(sheets):
+            records = []
+            if sheet % 2 == 0:
+                question = 0
+                while len(records) < rows:
+                    for part in range(rng.randint(1, group)):
+                        records.append({
+                            'id': f'{level}-{sheet}-{question}' if part == 0 else None,
+                            'Question': f'第{question}题 第{part}行 ' + 'x' * rng.randint(10, 60),
+                            'Note': part
+                        })
+                    question += 1
+                records = records[:rows]
+            else:
+                for row in range(rows):
+                    records.append({
+                        'id': f'{level}-{sheet}-{row}',
+                        'Content': f'场景{row} ' + 'y' * rng.randint(10, 60),
+                        'Note': row
+                    })
+            pd.DataFrame(records).to_excel(writer, sheet_name=f'Sheet{sheet}', index=False)
+
+
+def makeAnswers(count, seed=0):
+    rng = random.Random(seed)
+    answers = []
+    for index in range(count):
+        type = ANSWER_TYPES[index % 4]
+        rec = {'type': type, 'question_id': f'1-0-{index}', 'description': f'题目{index}', 'score': 10}
+        if type == 'SingleChoice':
+            rec.update(user_answer=rng.choice('ABCD'), correct_answer='A', question_content=['甲', '乙', '丙', '丁'])
+        elif type == 'MultipleChoice':
+            rec.update(user_answer=rng.choice([['A', 'B'], ['A']]), correct_answers=['B', 'A'],
+                       question_content=['甲', '乙', '丙'])
+        elif type == 'SceneTraining':
+            rec.update(user_answer=rng.choice(['True', 'False']), question_content='场景描述')
+        else:
+            rec.update(user_answer=rng.choice([True, False]), correct_answer=True)
+        answers.append(rec)
+    return answers
+
+
+def makeResult(path, answers, trainer):
+    with open(path, 'w', encoding='UTF-16') as jsonFile:
+        json.dump({'metadata': {'trainer': trainer}, 'answers': answers}, jsonFile, ensure_ascii=False)
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def runBenchmarks(args):
+    import bank
+    import main
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QApplication
+    from results import computeScore, readResult
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    excels = [os.path.abspath(f'Level-{level}.xlsx') for level in (1, 2, 3, 4)]
+    for level, excel in enumerate(excels, 1):
+        makeWorkbook(excel, level, args.sheets, args.rows, args.group, seed=level)
+        setattr(main, f'LEVEL_{level}_EXCEL', excel)
+    resultFolder = os.path.abspath('results')
+    os.makedirs(resultFolder)
+    answers = makeAnswers(args.answers)
+    for index in range(args.results):
+        makeResult(os.path.join(resultFolder, f'result_{index:04d}.json'), answers, f'学员{index}')
+    main.RESULT_FOLDER = resultFolder
+    main.UNREAL_APPLICATION = ''
+
+    def loadedWindow():
+        window = main.MainWindow()
+        while window.pendingLevels > 0:
+            app.processEvents()
+            time.sleep(0.001)
+        return window
+
+    def coldLoad():
+        bank.BankCache().invalidate()
+        loadedWindow().close()
+
+    def pageBuild():
+        window.pages.pop(1, None)
+        window.levelPages.pop(1, None)
+        window.showPage(1)
+
+    results = {}
+    results['parse workbook'] = measure(lambda: bank.readLevel(excels[0]), args.repeat)
+    results['loadData cold'] = measure(coldLoad, args.repeat)
+    results['loadData cached'] = measure(lambda: loadedWindow().close(), args.repeat)
+
+    window = loadedWindow()
+    results['createLevelPage'] = measure(pageBuild, args.repeat)
+
+    df = max(window.level1Sheets.values(), key=len)
+
+    def scroll():
+        model = main.PandasModel(df)
+        for row in range(model.rowCount()):
+            model.data(model.index(row, 0), Qt.CheckStateRole)
+            for col in range(1, model.columnCount()):
+                model.data(model.index(row, col), Qt.DisplayRole)
+
+    results['PandasModel scroll'] = measure(scroll, args.repeat)
+    def export():
+        # 导出在后台线程中完成，等待确认按钮重新可用
+        window.okButtonClicked()
+        while window.exportFuture is not None:
+            app.processEvents()
+            time.sleep(0.001)
+
+    results['okButtonClicked export'] = measure(export, args.repeat)
+
+    resultPath = os.path.join(resultFolder, 'result_0000.json')
+
+    def openDialog():
+        dialog = main.ResultDetailDialog(resultPath)
+        dialog.show()
+        while dialog.answerCount is None:
+            app.processEvents()
+            time.sleep(0.001)
+        dialog.close()
+
+    results['ResultDetailDialog open'] = measure(openDialog, args.repeat)
+    parsed = readResult(resultPath)['answers']
+    results['computeScore'] = measure(lambda: computeScore(parsed), args.repeat)
+    window.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, seconds in results.items():
+        previous = baseline.get(name)
+        if previous and seconds > previous * (1 + threshold):
+            regressions.append((name, previous, seconds))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='启动器关键路径性能基准')
+    parser.add_argument('--sheets', type=int, default=6)
+    parser.add_argument('--rows', type=int, default=2000, help='每个工作表的 Excel 行数')
+    parser.add_argument('--group', type=int, default=3, help='每道 Question 题目最多占用的行数')
+    parser.add_argument('--answers', type=int, default=2000, help='每个结果文件的答题数')
+    parser.add_argument('--results', type=int, default=20, help='结果文件个数')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', help='将本次结果保存为基线 JSON')
+    parser.add_argument('--baseline', help='与已保存的基线 JSON 比较')
+    parser.add_argument('--threshold', type=float, default=0.2, help='允许的变慢比例')
+    args = parser.parse_args()
+
+    for option in ('save', 'baseline'):
+        if getattr(args, option):
+            setattr(args, option, os.path.abspath(getattr(args, option)))
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        try:
+            results = runBenchmarks(args)
+        finally:
+            os.chdir(cwd)
+
+    for name, seconds in results.items():
+        print(f'{name:<28}{seconds * 1000:10.1f} ms')
+
+    if args.save:
+        with open(args.save, 'w', encoding='UTF-8') as jsonFile:
+            json.dump({'config': vars(args), 'results': results}, jsonFile, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='UTF-8') as jsonFile:
+            baseline = json.load(jsonFile)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for name, previous, seconds in regressions:
+            print(f'性能回退：{name} {previous * 1000:.1f} ms -> {seconds * 1000:.1f} ms')
+        if regressions:
+            sys.exit(1)
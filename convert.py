@@ -0,0 +1,63 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from results import RESULT_FORMATS, decodeResult, encodeResult
+from session import writeFileAtomic
+from settings import *
+
+
+def convertFile(path, format, dryRun=False):
+    # 返回 (文件名, 原大小, 新大小, 原解析耗时, 新解析耗时, 错误)；往返校验一致后才替换原文件
+    try:
+        with open(path, 'rb') as resultFile:
+            raw = resultFile.read()
+        start = time.perf_counter()
+        data = decodeResult(raw)
+        oldParse = time.perf_counter() - start
+
+        encoded = encodeResult(data, format)
+        start = time.perf_counter()
+        decoded = decodeResult(encoded)
+        newParse = time.perf_counter() - start
+        if decoded != data:
+            raise ValueError('往返校验不一致')
+
+        if not dryRun and encoded != raw:
+            writeFileAtomic(path, encoded)
+        return os.path.basename(path), len(raw), len(encoded), oldParse, newParse, ''
+    except (OSError, ValueError, TypeError, OverflowError) as e:
+        return os.path.basename(path), 0, 0, 0.0, 0.0, str(e)
+
+
+def convert(folder, format, workers=None, dryRun=False):
+    paths = sorted(entry.path for entry in os.scandir(folder)
+                   if entry.is_file() and entry.name.lower().endswith('.json'))
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(convertFile, paths, [format] * len(paths), [dryRun] * len(paths),
+                             chunksize=max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))))
+    return rows, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='将结果文件批量转换为指定格式（原地替换）')
+    parser.add_argument('folder', nargs='?', default=RESULT_FOLDER)
+    parser.add_argument('-f', '--format', choices=RESULT_FORMATS, default='msgpack')
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    parser.add_argument('-n', '--dry-run', action='store_true', help='只统计大小和解析耗时，不修改文件')
+    args = parser.parse_args()
+
+    rows, elapsed = convert(args.folder, args.format, args.jobs, args.dry_run)
+    converted = [row for row in rows if not row[5]]
+    for name, _, _, _, _, error in rows:
+        if error:
+            print(f'{name}：{error}')
+    oldSize = sum(row[1] for row in converted)
+    newSize = sum(row[2] for row in converted)
+    oldParse = sum(row[3] for row in converted)
+    newParse = sum(row[4] for row in converted)
+    print(f'{"校验" if args.dry_run else "转换"} {len(converted)}/{len(rows)} 个文件，用时 {elapsed:.2f} 秒')
+    print(f'大小：{oldSize / 1024:.0f} KB -> {newSize / 1024:.0f} KB（{newSize / max(oldSize, 1):.0%}）')
+    print(f'解析：{oldParse * 1000:.1f} ms -> {newParse * 1000:.1f} ms')
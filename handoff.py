@@ -0,0 +1,125 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from settings import *
+
+# 共享内存布局（小端）：魔数、版本、代数、数据长度、CRC32，随后是 UTF-8 JSON。
+# 代数为奇数表示正在写入；读取方在读取前后代数一致且为偶数时才接受数据。
+MAGIC = b'QTSS'
+VERSION = 1
+HEADER = struct.Struct('<4sIQII')
+
+
+class HandoffWriter:
+    def __init__(self, path=HANDOFF_FILE, size=HANDOFF_SIZE):
+        self.path = path
+        self.size = size
+        mode = 'r+b' if os.path.exists(path) and os.path.getsize(path) == size else 'w+b'
+        self.file = open(path, mode)
+        if mode == 'w+b':
+            self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+        magic, version, generation, _, _ = HEADER.unpack_from(self.map, 0)
+        # 沿用已有代数，启动器重启后模拟器仍能识别出新的会话
+        self.generation = generation + (generation & 1) if magic == MAGIC and version == VERSION else 0
+
+    def publish(self, config):
+        payload = json.dumps(config, ensure_ascii=False).encode('UTF-8')
+        if HEADER.size + len(payload) > self.size:
+            raise ValueError(f'会话配置过大：{len(payload)} 字节')
+        writing = self.generation + 1
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, writing, 0, 0)
+        self.map[HEADER.size:HEADER.size + len(payload)] = payload
+        self.generation = writing + 1
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, self.generation, len(payload), zlib.crc32(payload))
+        self.map.flush()
+        return self.generation // 2
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# 参考读取方，模拟器端可按同样的流程实现
+class HandoffReader:
+    def __init__(self, path=HANDOFF_FILE):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.generation = 0
+
+    def poll(self):
+        for _ in range(100):
+            magic, version, generation, length, crc = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC or version != VERSION or generation == self.generation:
+                return None
+            if generation & 1:
+                continue
+            payload = self.map[HEADER.size:HEADER.size + length]
+            if HEADER.unpack_from(self.map, 0)[2] != generation or zlib.crc32(payload) != crc:
+                continue
+            self.generation = generation
+            return generation // 2, json.loads(payload.decode('UTF-8'))
+        return None
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def measureLatency(path, count=200):
+    # 发布到读取方检测到新会话的延迟，读取方在另一线程中持续轮询
+    writer = HandoffWriter(path)
+    reader = HandoffReader(path)
+    reader.poll()
+    received = {}
+    done = threading.Event()
+
+    def poll():
+        while not done.is_set():
+            result = reader.poll()
+            if result is not None:
+                received[result[1]['sequence']] = time.perf_counter()
+
+    thread = threading.Thread(target=poll, daemon=True)
+    thread.start()
+    sent = {}
+    publishTimes = []
+    for sequence in range(count):
+        config = {'sequence': sequence, 'name': f'学员{sequence}', 'questions': [[str(i), 10] for i in range(500)]}
+        start = time.perf_counter()
+        writer.publish(config)
+        sent[sequence] = time.perf_counter()
+        publishTimes.append(sent[sequence] - start)
+        while sequence not in received and time.perf_counter() - start < 1:
+            time.sleep(0)
+    done.set()
+    thread.join()
+    writer.close()
+    reader.close()
+    latencies = sorted(received[sequence] - sent[sequence] + publishTimes[sequence] for sequence in received)
+    return sorted(publishTimes), latencies
+
+
+if __name__ == '__main__':
+    import sys
+    import tempfile
+
+    if '--watch' in sys.argv:
+        reader = HandoffReader()
+        while True:
+            result = reader.poll()
+            if result is not None:
+                generation, config = result
+                print(f'会话 {generation}：{config["name"]}，题目 {len(config["questions"])} 道')
+            time.sleep(0.05)
+    else:
+        with tempfile.TemporaryDirectory() as folder:
+            publishTimes, latencies = measureLatency(os.path.join(folder, 'session.mmap'))
+        for label, values in (('发布耗时', publishTimes), ('发布到读取延迟', latencies)):
+            print(f'{label}：p50 {values[len(values) // 2] * 1e6:.0f} us，p95 {values[len(values) * 95 // 100] * 1e6:.0f} us')
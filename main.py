@@ -1,19 +1,28 @@
-import csv
-import json
+import profiling
+
 import os.path
-import struct
-import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-import pandas as pd
-import yaml
-from PyQt5.QtCore import Qt, QAbstractTableModel, QTime, QDir
-from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt, QAbstractItemModel, QAbstractTableModel, QModelIndex, QTime, QTimer, QFileSystemWatcher, pyqtSignal
+from PyQt5.QtGui import QIcon, QKeySequence
+from PyQt5.QtSql import QSqlDatabase, QSqlTableModel
 from PyQt5.QtWidgets import QApplication, QMainWindow, QTableView, QPushButton, QHBoxLayout, QVBoxLayout, QWidget, \
     QLabel, QHeaderView, QStyledItemDelegate, QSpinBox, QAction, QTimeEdit, QComboBox, QStackedWidget, QStyle, \
-    QLineEdit, QFileSystemModel, QDialog, QTreeWidget, QTreeWidgetItem, QCheckBox
+    QLineEdit, QDialog, QTreeView, QCheckBox, QShortcut, QTableWidget, QTableWidgetItem
 
+from bank import BankCache, loadLevelJob, mergeSheets, workbookStat
+from handoff import HandoffWriter
+from questionindex import QuestionIndex
+from results import ResultIndex, computeScore, isAnswerCorrect, readResult
+from session import WEATHERS, encodeTime, questionRows, sessionConfig, writeSession
 from settings import *
+from supervisor import Supervisor
+import tracing
+
+profiling.record('imports', profiling.START)
 
 
 class SpinBoxDelegate(QStyledItemDelegate):
@@ -34,15 +43,56 @@ class SpinBoxDelegate(QStyledItemDelegate):
 
 
 class PandasModel(QAbstractTableModel):
-    def __init__(self, data: pd.DataFrame):
+    def __init__(self, data: 'pd.DataFrame'):
         super().__init__()
+        import numpy as np
+
+        self._data = data
+        # 勾选和分值两列保存为连续数组，其余列在首次显示时转换为字符串并缓存
+        self._required = data.iloc[:, 0].to_numpy(dtype=bool, copy=True)
+        self._score = data.iloc[:, 1].to_numpy(dtype=np.int64, copy=True)
+        self._display = {}
+        # 附加在末尾的只读统计列，不写入 DataFrame
+        self._extra = []
+        self.statsShown = False
+
+    def replaceData(self, data):
+        # 题库热更新后原地替换数据，视图和代理保持不变
+        import numpy as np
+
+        self.beginResetModel()
         self._data = data
+        self._required = data.iloc[:, 0].to_numpy(dtype=bool, copy=True)
+        self._score = data.iloc[:, 1].to_numpy(dtype=np.int64, copy=True)
+        self._display = {}
+        self._extra = []
+        self.endResetModel()
 
     def rowCount(self, parent=None):
         return self._data.shape[0]
 
     def columnCount(self, parent=None):
-        return self._data.shape[1]
+        return self._data.shape[1] + len(self._extra)
+
+    def setExtraColumns(self, columns):
+        base = self._data.shape[1]
+        if self._extra:
+            self.beginRemoveColumns(QModelIndex(), base, base + len(self._extra) - 1)
+            self._extra = []
+            self.endRemoveColumns()
+        if columns:
+            self.beginInsertColumns(QModelIndex(), base, base + len(columns) - 1)
+            self._extra = columns
+            self.endInsertColumns()
+
+    def displayColumn(self, col):
+        if col >= self._data.shape[1]:
+            return self._extra[col - self._data.shape[1]][1]
+        column = self._display.get(col)
+        if column is None:
+            column = [str(value) for value in self._data.iloc[:, col].tolist()]
+            self._display[col] = column
+        return column
 
     def data(self, index, role=Qt.DisplayRole):
         col = index.column()
@@ -50,16 +100,20 @@ class PandasModel(QAbstractTableModel):
 
         if col == 0:
             if role == Qt.CheckStateRole:
-                return Qt.Checked if self._data.iat[row, col] else Qt.Unchecked
+                return Qt.Checked if self._required[row] else Qt.Unchecked
             return None
 
         if role in (Qt.DisplayRole, Qt.EditRole):
-            return str(self._data.iat[row, col])
+            if col == 1:
+                return str(self._score[row])
+            return self.displayColumn(col)[row]
         return None
 
     def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
         if role == Qt.DisplayRole:
             if orientation == Qt.Horizontal:
+                if section >= self._data.shape[1]:
+                    return self._extra[section - self._data.shape[1]][0]
                 colName = str(self._data.columns[section])
                 if colName == 'required':
                     return ''
@@ -79,13 +133,15 @@ class PandasModel(QAbstractTableModel):
         row = index.row()
 
         if col == 0 and role == Qt.CheckStateRole:
-            self._data.iat[row, col] = (value == Qt.Checked)
+            self._required[row] = (value == Qt.Checked)
+            self._data.iat[row, col] = bool(self._required[row])
             self.dataChanged.emit(index, index)
             return True
         elif col == 1 and role == Qt.EditRole:
             try:
                 int_value = int(value)
                 if 0 <= int_value <= 100:
+                    self._score[row] = int_value
                     self._data.iat[row, col] = int_value
                     self.dataChanged.emit(index, index)
                     return True
@@ -94,9 +150,59 @@ class PandasModel(QAbstractTableModel):
 
         return False
 
+    def rowIndices(self, rows):
+        # rows 可以是切片、行号数组或布尔掩码
+        import numpy as np
+
+        return np.arange(self.rowCount())[rows]
+
+    def matchRows(self, text, col=None):
+        import numpy as np
+
+        cols = range(2, self._data.shape[1]) if col is None else (col,)
+        mask = np.zeros(self.rowCount(), dtype=bool)
+        for c in cols:
+            mask |= np.char.find(np.array(self.displayColumn(c), dtype=str), text) >= 0
+        return mask
+
+    def setRequired(self, rows, checked):
+        rows = self.rowIndices(rows)
+        if len(rows) == 0:
+            return
+        self._required[rows] = checked
+        self._data[self._data.columns[0]] = self._required.copy()
+        self.dataChanged.emit(self.index(int(rows.min()), 0), self.index(int(rows.max()), 0))
+
+    def setScore(self, rows, score):
+        rows = self.rowIndices(rows)
+        if len(rows) == 0 or not 0 <= score <= 100:
+            return
+        self._score[rows] = score
+        self._data[self._data.columns[1]] = self._score.copy()
+        self.dataChanged.emit(self.index(int(rows.min()), 1), self.index(int(rows.max()), 1))
+
+    def setSelection(self, required, score):
+        # 整体替换勾选和分值两列，只发出一次更新
+        if self.rowCount() == 0:
+            return
+        self._required[:] = required
+        self._score[:] = score
+        self._data[self._data.columns[0]] = self._required.copy()
+        self._data[self._data.columns[1]] = self._score.copy()
+        self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, 1))
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    levelLoaded = pyqtSignal(int, object, int, object)
+    levelFailed = pyqtSignal(int, str)
+    levelReloaded = pyqtSignal(int, object, object)
+    resultIndexUpdated = pyqtSignal(object, object)
+    processEvent = pyqtSignal(str, str, object)
+    exportProgress = pyqtSignal(int, int)
+    exportFinished = pyqtSignal(str)
+    stationExported = pyqtSignal(str, str)
+
+    def __init__(self, stations=None):
         super().__init__()
         self.setWindowTitle('Starter')
         self.setWindowIcon(QIcon('icon/plane.png'))
@@ -122,36 +228,208 @@ class MainWindow(QMainWindow):
         self.camera0Check = None
         self.camera1Check = None
         self.camera2Check = None
-        self.loadData()
-        self.initUi()
+        self.okBtn = None
+        self.cancelBtn = None
+        self.exportLabel = None
+        self.pages = {}
+        self.levelPages = {}
+        self.levelErrors = {}
+        self.levelSheetShow = {}
+        self.sheetModels = {}
+        self.workbookStats = {}
+        self.workbookWatcher = None
+        self.reloadDebounce = None
+        self.reloadPool = None
+        self.questionIndex = QuestionIndex()
+        self.searchTable = None
+        self.settledLevels = set()
+        self.loadPool = None
+        self.loadStart = None
+        self.pendingLevels = 0
+        self.resultModel = None
+        self.resultStatusLabel = None
+        self.resultStatus = ''
+        self.resultWatcher = None
+        self.resultDebounce = None
+        self.indexing = False
+        self.indexPending = False
+        self.questionStats = None
+        self.processStatusLabel = None
+        self.processStatus = {}
+        # 多工位配置，默认取 settings.STATIONS
+        self.stations = STATIONS if stations is None else stations
+        self.stationLabel = None
+        self.stationStatus = {}
+        self.stationWriters = {}
+        self.supervisor = Supervisor(onEvent=self.processEvent.emit, stations=self.stations)
+        self.handoffWriter = None
+        # 导出、启动应用和读取结果文件等阻塞 I/O 在后台线程池中执行
+        self.ioPool = ThreadPoolExecutor(max_workers=2)
+        self.exportFuture = None
+        self.exportCancel = None
+        self.exportProgress.connect(self.onExportProgress)
+        self.exportFinished.connect(self.onExportFinished)
+        self.stationExported.connect(self.onStationExported)
+        self.processEvent.connect(self.onProcessEvent)
+        self.levelLoaded.connect(self.onLevelLoaded)
+        self.levelFailed.connect(self.onLevelFailed)
+        self.levelReloaded.connect(self.onLevelReloaded)
+        self.resultIndexUpdated.connect(self.onResultIndexUpdated)
+        with profiling.span('initUi'):
+            self.initUi()
+        with profiling.span('loadData'):
+            self.loadData()
+        self.refreshResultIndex()
+        self.watchResultFolder()
+        self.watchWorkbooks()
+        if TRACKER_PREWARM and self.supervisor.tracker.available():
+            self.supervisor.tracker.start()
 
     def loadData(self):
-        if os.path.exists(LEVEL_1_EXCEL):
-            self.level1Sheets = pd.read_excel(LEVEL_1_EXCEL, sheet_name=None, dtype={'id': str})
-        if os.path.exists(LEVEL_2_EXCEL):
-            self.level2Sheets = pd.read_excel(LEVEL_2_EXCEL, sheet_name=None, dtype={'id': str})
-        if os.path.exists(LEVEL_3_EXCEL):
-            self.level3Sheets = pd.read_excel(LEVEL_3_EXCEL, sheet_name=None, dtype={'id': str})
-        if os.path.exists(LEVEL_4_EXCEL):
-            self.level4Sheets = pd.read_excel(LEVEL_4_EXCEL, sheet_name=None, dtype={'id': str})
-
-        for level in [self.level1Sheets, self.level2Sheets,
-                      self.level3Sheets, self.level4Sheets]:
-            if level is None:
+        self.bankCache = BankCache()
+        excels = {1: LEVEL_1_EXCEL, 2: LEVEL_2_EXCEL, 3: LEVEL_3_EXCEL, 4: LEVEL_4_EXCEL}
+        jobs = {level: path for level, path in excels.items() if os.path.exists(path)}
+        for level, path in excels.items():
+            self.workbookStats[level] = workbookStat(path)
+        for level in excels:
+            if level not in jobs:
+                self.settledLevels.add(level)
+        if not jobs:
+            return
+
+        # 四个关卡在进程池中并行解析，窗口无需等待
+        self.pendingLevels = len(jobs)
+        self.loadStart = time.perf_counter()
+        self.okBtn.setEnabled(False)
+        self.loadPool = ProcessPoolExecutor(max_workers=len(jobs))
+        for level, path in jobs.items():
+            future = self.loadPool.submit(loadLevelJob, path, self.bankCache.folder, level)
+            future.add_done_callback(lambda f, i=level: self.levelJobDone(i, f))
+
+    def levelJobDone(self, level, future):
+        # 运行在进程池的回调线程中，通过信号转回界面线程
+        if future.cancelled():
+            return
+        try:
+            sheets, hits, levelIndex = future.result()
+        except Exception as e:
+            self.levelFailed.emit(level, str(e))
+            return
+        self.levelLoaded.emit(level, sheets, hits, levelIndex)
+
+    def onLevelLoaded(self, level, sheets, hits, levelIndex):
+        profiling.record(f'Level{level} 后台加载', self.loadStart)
+        tracing.record('loadLevel', time.perf_counter() - self.loadStart, level=level, cached=bool(hits),
+                       sheets=len(sheets), rows=sum(len(df) for df in sheets.values()))
+        self.bankCache.hits += hits
+        self.bankCache.misses += 1 - hits
+        setattr(self, f'level{level}Sheets', sheets)
+        self.questionIndex.setLevel(levelIndex)
+        self.levelSettled(level)
+
+    def onLevelFailed(self, level, message):
+        self.levelErrors[level] = message
+        self.levelSettled(level)
+
+    def levelSettled(self, level):
+        self.settledLevels.add(level)
+        if level in self.levelPages:
+            with profiling.span(f'populateLevelPage({level})'):
+                self.populateLevelPage(level)
+        self.pendingLevels -= 1
+        if self.pendingLevels == 0:
+            self.okBtn.setEnabled(self.exportFuture is None)
+            self.loadPool.shutdown(wait=False)
+            self.loadPool = None
+
+    def watchWorkbooks(self):
+        # 同时监视工作簿所在目录，Excel 以替换文件的方式保存时也能察觉
+        paths = {1: LEVEL_1_EXCEL, 2: LEVEL_2_EXCEL, 3: LEVEL_3_EXCEL, 4: LEVEL_4_EXCEL}
+        watched = [path for path in paths.values() if os.path.exists(path)]
+        watched += list({os.path.dirname(path) for path in paths.values() if os.path.isdir(os.path.dirname(path))})
+        if not watched:
+            return
+        self.reloadDebounce = QTimer(self)
+        self.reloadDebounce.setSingleShot(True)
+        self.reloadDebounce.setInterval(RELOAD_DEBOUNCE_MS)
+        self.reloadDebounce.timeout.connect(self.reloadChangedWorkbooks)
+        self.workbookWatcher = QFileSystemWatcher(watched, self)
+        self.workbookWatcher.fileChanged.connect(lambda _: self.reloadDebounce.start())
+        self.workbookWatcher.directoryChanged.connect(lambda _: self.reloadDebounce.start())
+
+    def reloadChangedWorkbooks(self):
+        paths = {1: LEVEL_1_EXCEL, 2: LEVEL_2_EXCEL, 3: LEVEL_3_EXCEL, 4: LEVEL_4_EXCEL}
+        for level, path in paths.items():
+            stat = workbookStat(path)
+            if stat == self.workbookStats.get(level) or stat is None or level not in self.settledLevels:
                 continue
-            for name, df in level.items():
-                df['id'] = df['id'].ffill()
-                if 'Question' in df.columns:
-                    df = (
-                        df.groupby('id', as_index=False)
-                        .agg({
-                            'Question': ' '.join
-                        })
-                    )
-
-                df.insert(0, 'required', True)
-                df.insert(1, 'score', 10)
-                level[name] = df
+            self.workbookStats[level] = stat
+            if path not in self.workbookWatcher.files():
+                self.workbookWatcher.addPath(path)
+            if self.reloadPool is None:
+                self.reloadPool = ProcessPoolExecutor(max_workers=1)
+            future = self.reloadPool.submit(loadLevelJob, path, self.bankCache.folder, level)
+            future.add_done_callback(lambda f, i=level: self.reloadJobDone(i, f))
+
+    def reloadJobDone(self, level, future):
+        if future.cancelled():
+            return
+        try:
+            sheets, _, levelIndex = future.result()
+        except Exception:
+            # 文件可能仍在保存中，等待下一次变化
+            return
+        self.levelReloaded.emit(level, sheets, levelIndex)
+
+    def onLevelReloaded(self, level, sheets, levelIndex):
+        oldSheets = getattr(self, f'level{level}Sheets')
+        with tracing.span('mergeLevel', level=level) as span:
+            merged, changed = mergeSheets(oldSheets, sheets)
+            span.set(changed=len(changed), sheets=len(merged))
+        if oldSheets is not None and not changed and list(merged) == list(oldSheets):
+            return
+        setattr(self, f'level{level}Sheets', merged)
+        self.questionIndex.setLevel(levelIndex)
+
+        def visible(sheets):
+            return [name for name, df in sheets.items() if not df.empty]
+
+        structural = oldSheets is None or visible(oldSheets) != visible(merged) or any(
+            list(oldSheets[name].columns) != list(merged[name].columns) for name in changed if name in oldSheets)
+        if not structural:
+            for name in changed:
+                model = self.sheetModels.get((level, name))
+                if model is not None:
+                    model.replaceData(merged[name])
+                    self.applyStats(model)
+            return
+
+        # 工作表增减或列变化时重建整个关卡页面
+        self.levelErrors.pop(level, None)
+        for key in [key for key in self.sheetModels if key[0] == level]:
+            del self.sheetModels[key]
+        if level in self.pages:
+            current = self.stacked.currentIndex()
+            del self.pages[level]
+            del self.levelPages[level]
+            self.levelSheetShow.pop(level, None)
+            self.showPage(level)
+            self.stacked.setCurrentIndex(current)
+
+    def closeEvent(self, event):
+        # 窗口关闭后不再响应文件变化
+        for watcher in (self.workbookWatcher, self.resultWatcher):
+            if watcher is not None:
+                watcher.blockSignals(True)
+        for timer in (self.reloadDebounce, self.resultDebounce):
+            if timer is not None:
+                timer.stop()
+        if self.reloadPool is not None:
+            self.reloadPool.shutdown(wait=False, cancel_futures=True)
+        if self.loadPool is not None:
+            self.loadPool.shutdown(wait=False, cancel_futures=True)
+        self.ioPool.shutdown(wait=False, cancel_futures=True)
+        super().closeEvent(event)
 
     def createAction(self, name, level):
         if level == 0:
@@ -166,9 +444,31 @@ class MainWindow(QMainWindow):
             action = QAction(QIcon('icon/four.png'), 'Level4', self)
         elif level == 5:
             action = QAction(QIcon('icon/result.png'), 'Result', self)
-        action.triggered.connect(lambda _, i=level: self.stacked.setCurrentIndex(i))
+        action.triggered.connect(lambda _, i=level: self.showPage(i))
         self.toolbar.addAction(action)
 
+    def showPage(self, index):
+        # 页面在首次切换时才创建，先用空白占位
+        if index not in self.pages:
+            if index == 5:
+                with profiling.span('createResultPage'), tracing.span('createResultPage'):
+                    page = self.createResultPage()
+            elif index == 6:
+                page = self.createDiagnosticsPage()
+            elif index == 7:
+                page = self.createSearchPage()
+            else:
+                with profiling.span(f'createLevelPage({index})'), tracing.span('createLevelPage', level=index):
+                    page = self.createLevelPage(index)
+            placeholder = self.stacked.widget(index)
+            self.stacked.insertWidget(index, page)
+            self.stacked.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.pages[index] = page
+        if index == 6:
+            self.refreshDiagnostics()
+        self.stacked.setCurrentIndex(index)
+
     def createEnvPage(self):
         widget = QWidget()
         envLabel = QLabel(PAGE_0_NAME0)
@@ -197,7 +497,7 @@ class MainWindow(QMainWindow):
 
         weatherLabel = QLabel('天气：')
         self.weatherPicker = QComboBox()
-        self.weatherPicker.addItems(['晴', '多云', '雾', '雷', '雷雨', '雪', '雨', '霜'])
+        self.weatherPicker.addItems(WEATHERS)
         hBox1.addWidget(weatherLabel)
         hBox1.addWidget(self.weatherPicker)
         hBox1.addStretch(5)
@@ -318,6 +618,81 @@ class MainWindow(QMainWindow):
         hbox5.addWidget(camera2Label)
         hbox5.addStretch(6)
 
+        variantLabel = QLabel('随机抽题')
+        variantLabel.setStyleSheet("font-weight:bold; margin-left:0px; margin-top:10px; margin-bottom:10px")
+
+        hbox6 = QHBoxLayout()
+        perSheetInput = QSpinBox()
+        perSheetInput.setMinimum(1)
+        perSheetInput.setMaximum(1000)
+        perSheetInput.setValue(VARIANT_PER_SHEET)
+        seedInput = QSpinBox()
+        seedInput.setMaximum(999999)
+        variantInput = QSpinBox()
+        variantInput.setMinimum(1)
+        variantInput.setMaximum(9999)
+        variantBtn = QPushButton('抽题')
+        variantBtn.clicked.connect(lambda: self.applyVariant(perSheetInput.value(), seedInput.value(),
+                                                             variantInput.value() - 1))
+        hbox6.addWidget(QLabel('每表题数'))
+        hbox6.addWidget(perSheetInput)
+        hbox6.addWidget(QLabel('种子'))
+        hbox6.addWidget(seedInput)
+        hbox6.addWidget(QLabel('第'))
+        hbox6.addWidget(variantInput)
+        hbox6.addWidget(QLabel('套'))
+        hbox6.addWidget(variantBtn)
+        hbox6.addStretch(8)
+
+        profileLabel = QLabel('配置方案')
+        profileLabel.setStyleSheet("font-weight:bold; margin-left:0px; margin-top:10px; margin-bottom:10px")
+
+        hbox7 = QHBoxLayout()
+        profileInput = QComboBox()
+        profileInput.setEditable(True)
+        profileInput.setMinimumWidth(200)
+        profileStatus = QLabel()
+
+        def refreshProfiles(current=''):
+            from profiles import loadProfiles
+
+            profileInput.clear()
+            profileInput.addItems(sorted(loadProfiles()))
+            profileInput.setCurrentText(current)
+
+        def applyBtnClicked():
+            result = self.applyProfile(profileInput.currentText())
+            if result is None:
+                profileStatus.setText('未找到该方案或题目尚未加载')
+            else:
+                added, removed = result
+                profileStatus.setText(f'已应用；新增题目 {added} 道（未勾选），方案中已删除的题目 {removed} 道')
+
+        def saveBtnClicked():
+            name = profileInput.currentText().strip()
+            if self.saveProfile(name):
+                refreshProfiles(name)
+                profileStatus.setText(f'已保存：{name}')
+
+        def deleteBtnClicked():
+            self.deleteProfile(profileInput.currentText())
+            refreshProfiles()
+            profileStatus.setText('')
+
+        applyProfileBtn = QPushButton('应用')
+        applyProfileBtn.clicked.connect(applyBtnClicked)
+        saveProfileBtn = QPushButton('保存')
+        saveProfileBtn.clicked.connect(saveBtnClicked)
+        deleteProfileBtn = QPushButton('删除')
+        deleteProfileBtn.clicked.connect(deleteBtnClicked)
+        refreshProfiles()
+        hbox7.addWidget(profileInput)
+        hbox7.addWidget(applyProfileBtn)
+        hbox7.addWidget(saveProfileBtn)
+        hbox7.addWidget(deleteProfileBtn)
+        hbox7.addWidget(profileStatus)
+        hbox7.addStretch(6)
+
         vbox = QVBoxLayout(widget)
         vbox.addWidget(envLabel)
         vbox.addLayout(hBox1)
@@ -326,22 +701,16 @@ class MainWindow(QMainWindow):
         vbox.addLayout(hbox3)
         vbox.addLayout(hbox4)
         vbox.addLayout(hbox5)
+        vbox.addWidget(variantLabel)
+        vbox.addLayout(hbox6)
+        vbox.addWidget(profileLabel)
+        vbox.addLayout(hbox7)
         vbox.addStretch(6)
 
         return widget
 
     def createLevelPage(self, level):
         widget = QWidget()
-
-        if level == 1:
-            sheets = self.level1Sheets
-        elif level == 2:
-            sheets = self.level2Sheets
-        elif level == 3:
-            sheets = self.level3Sheets
-        elif level == 4:
-            sheets = self.level4Sheets
-
         vbox = QVBoxLayout(widget)
 
         if level == 1:
@@ -355,47 +724,214 @@ class MainWindow(QMainWindow):
         levelLabel.setStyleSheet("font-weight:bold; margin-left:0px; margin-top:10px; margin-bottom:10px")
         vbox.addWidget(levelLabel)
 
+        loadingLabel = QLabel('题目加载中……')
+        vbox.addWidget(loadingLabel)
+        vbox.addStretch(2)
+        self.levelPages[level] = (vbox, loadingLabel)
+        if level in self.settledLevels:
+            self.populateLevelPage(level)
+
+        return widget
+
+    def populateLevelPage(self, level):
+        vbox, loadingLabel = self.levelPages[level]
+        loadingLabel.deleteLater()
+        vbox.takeAt(vbox.count() - 1)
+        vbox.removeWidget(loadingLabel)
+
+        if level == 1:
+            sheets = self.level1Sheets
+        elif level == 2:
+            sheets = self.level2Sheets
+        elif level == 3:
+            sheets = self.level3Sheets
+        elif level == 4:
+            sheets = self.level4Sheets
+
         if sheets is None:
             errorLabel = QLabel('本关卡题目配置读取失败，请确认路径是否正确！')
             vbox.addWidget(errorLabel)
+            if level in self.levelErrors:
+                vbox.addWidget(QLabel(self.levelErrors[level]))
             vbox.addStretch(2)
-            return widget
+            return
 
         stackedWidget = QStackedWidget()
         sheethBox = QHBoxLayout()
+        sheetTables = {}
+
+        sheetShow = {}
+        self.levelSheetShow[level] = sheetShow
+
+        def showSheet(index, name):
+            # 表格在首次点击对应按钮时才创建，使用热更新后的最新数据
+            if index not in sheetTables:
+                table = self.createSheetTable(getattr(self, f'level{level}Sheets')[name], level, name)
+                placeholder = stackedWidget.widget(index)
+                stackedWidget.insertWidget(index, table)
+                stackedWidget.removeWidget(placeholder)
+                placeholder.deleteLater()
+                sheetTables[index] = table
+            stackedWidget.setCurrentIndex(index)
+            return sheetTables[index]
+
         sheetIndex = 0
         for sheet_name, df in sheets.items():
             if not df.empty:
                 sheetBtn = QPushButton(sheet_name)
-                sheetBtn.clicked.connect(lambda _, i=sheetIndex: stackedWidget.setCurrentIndex(i))
+                sheetBtn.clicked.connect(lambda _, i=sheetIndex, n=sheet_name: showSheet(i, n))
+                sheetShow[sheet_name] = lambda i=sheetIndex, n=sheet_name: showSheet(i, n)
                 sheethBox.addWidget(sheetBtn)
+                stackedWidget.addWidget(QWidget())
+                if sheetIndex == 0:
+                    showSheet(0, sheet_name)
                 sheetIndex += 1
-
-                model = PandasModel(df)
-                table = QTableView()
-                table.verticalHeader().hide()
-                table.setModel(model)
-
-                table.setItemDelegateForColumn(1, SpinBoxDelegate())
-
-                for col in range(model.columnCount()):
-                    header = model.headerData(col, Qt.Horizontal)
-                    if header not in ('required', 'score', 'id', 'Question', 'Content'):
-                        table.hideColumn(col)
-
-                # 调整列宽
-                table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
-                table.showColumn(0)
-                table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
-                table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
-                table.horizontalHeader().setStretchLastSection(True)
-                stackedWidget.addWidget(table)
         sheethBox.addStretch(sheetIndex)
         vbox.addLayout(sheethBox)
         vbox.addWidget(stackedWidget)
 
+    def createSheetTable(self, df, level, sheet):
+        widget = QWidget()
+        vbox = QVBoxLayout(widget)
+        vbox.setContentsMargins(0, 0, 0, 0)
+
+        model = PandasModel(df)
+        self.sheetModels[(level, sheet)] = model
+        table = QTableView()
+        table.verticalHeader().hide()
+        table.setModel(model)
+
+        table.setItemDelegateForColumn(1, SpinBoxDelegate(table))
+
+        for col in range(model.columnCount()):
+            header = model.headerData(col, Qt.Horizontal)
+            if header not in ('required', 'score', 'id', 'Question', 'Content'):
+                table.hideColumn(col)
+
+        # 调整列宽，只按前若干行估算，避免扫描整张表
+        table.horizontalHeader().setResizeContentsPrecision(100)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        table.showColumn(0)
+        table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+
+        # 批量操作作用于选中的行，未选中任何行时作用于整张表；筛选框有内容时只作用于匹配的行
+        def selectedRows():
+            rows = sorted({index.row() for index in table.selectionModel().selectedIndexes()})
+            text = filterInput.text().strip()
+            if text:
+                mask = model.matchRows(text)
+                return [row for row in rows if mask[row]] if rows else mask
+            return rows if rows else slice(None)
+
+        hbox = QHBoxLayout()
+        filterInput = QLineEdit()
+        filterInput.setPlaceholderText('按内容筛选')
+        checkAllBtn = QPushButton('全选')
+        checkAllBtn.clicked.connect(lambda: model.setRequired(selectedRows(), True))
+        uncheckAllBtn = QPushButton('全不选')
+        uncheckAllBtn.clicked.connect(lambda: model.setRequired(selectedRows(), False))
+        scoreInput = QSpinBox()
+        scoreInput.setMaximum(100)
+        scoreInput.setValue(DEFAULT_SCORE)
+        scoreBtn = QPushButton('设置分值')
+        scoreBtn.clicked.connect(lambda: model.setScore(selectedRows(), scoreInput.value()))
+
+        # 可选的作答统计列：通过率、作答次数、平均得分
+        def statsChanged(state):
+            model.statsShown = bool(state)
+            self.applyStats(model)
+
+        statsCheck = QCheckBox('作答统计')
+        statsCheck.stateChanged.connect(statsChanged)
+        hbox.addWidget(filterInput)
+        hbox.addWidget(checkAllBtn)
+        hbox.addWidget(uncheckAllBtn)
+        hbox.addWidget(scoreInput)
+        hbox.addWidget(scoreBtn)
+        hbox.addWidget(statsCheck)
+        hbox.addStretch(5)
+
+        vbox.addLayout(hbox)
+        vbox.addWidget(table)
+        widget.table = table
+        return widget
+
+    def applyVariant(self, perSheet, seed, index):
+        # 第 index 套只取决于种子和题数，与当前的勾选和分值无关，可按学员序号复现
+        from variants import VariantSet, applyVariant
+
+        if self.pendingLevels > 0:
+            return
+        levels = (self.level1Sheets, self.level2Sheets, self.level3Sheets, self.level4Sheets)
+        with tracing.span('applyVariant', perSheet=perSheet, index=index):
+            variant = VariantSet(levels, perSheet, seed).variant(index)
+            applyVariant(levels, variant, self.sheetModels)
+
+    def applyStats(self, model):
+        if model.statsShown and self.questionStats is not None and 'id' in model._data.columns:
+            model.setExtraColumns(self.questionStats.displayColumns(model._data['id'].tolist()))
+        else:
+            model.setExtraColumns([])
+
+    def jumpToQuestion(self, level, sheet, row):
+        self.showPage(level)
+        if sheet not in self.levelSheetShow.get(level, {}):
+            return
+        table = self.levelSheetShow[level][sheet]().table
+        table.selectRow(row)
+        table.scrollTo(table.model().index(row, 2), QTableView.PositionAtCenter)
+
+    def jumpToQuestionId(self, id):
+        location = self.questionIndex.locate(id)
+        if location is not None:
+            self.jumpToQuestion(*location)
+        return location is not None
+
+    def createSearchPage(self):
+        widget = QWidget()
+        vbox = QVBoxLayout(widget)
+
+        searchLabel = QLabel('题目搜索')
+        searchLabel.setStyleSheet("font-weight:bold; margin-left:0px; margin-top:10px; margin-bottom:10px")
+        vbox.addWidget(searchLabel)
+
+        self.searchTable = QTableWidget(0, 4)
+        self.searchTable.setHorizontalHeaderLabels(['关卡', '工作表', '行', '内容'])
+        self.searchTable.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.searchTable.setSelectionBehavior(QTableWidget.SelectRows)
+        self.searchTable.verticalHeader().hide()
+        self.searchTable.horizontalHeader().setStretchLastSection(True)
+
+        def resultDoubleClicked(row):
+            level, sheet, sheetRow = self.searchTable.item(row, 0).data(Qt.UserRole)
+            self.jumpToQuestion(level, sheet, sheetRow)
+
+        self.searchTable.cellDoubleClicked.connect(lambda row, _: resultDoubleClicked(row))
+        vbox.addWidget(self.searchTable)
+
         return widget
 
+    def onSearchTextChanged(self, text):
+        # 清空搜索框时只清空结果，不切换页面
+        if not text.strip():
+            if self.searchTable is not None:
+                self.searchTable.setRowCount(0)
+            return
+        self.showPage(7)
+        with tracing.span('searchQuestions') as span:
+            results = self.questionIndex.search(text, SEARCH_LIMIT)
+            span.set(results=len(results))
+        self.searchTable.setRowCount(len(results))
+        for row, (level, sheet, sheetRow, content) in enumerate(results):
+            levelItem = QTableWidgetItem(f'Level{level}')
+            levelItem.setData(Qt.UserRole, (level, sheet, sheetRow))
+            self.searchTable.setItem(row, 0, levelItem)
+            self.searchTable.setItem(row, 1, QTableWidgetItem(sheet))
+            self.searchTable.setItem(row, 2, QTableWidgetItem(str(sheetRow + 1)))
+            self.searchTable.setItem(row, 3, QTableWidgetItem(content))
+
     def createResultPage(self):
         widget = QWidget()
         vbox = QVBoxLayout(widget)
@@ -404,27 +940,46 @@ class MainWindow(QMainWindow):
         resultPageLabel.setStyleSheet("font-weight:bold; margin-left:0px; margin-top:10px; margin-bottom:10px")
         vbox.addWidget(resultPageLabel)
 
-        model = QFileSystemModel()
-        model.setFilter(QDir.Files | QDir.NoDotAndDotDot)
-        model.setNameFilters(["*.json"])
-        model.setNameFilterDisables(False)
-        model.setRootPath(RESULT_FOLDER)
+        # 列表直接读取本地结果索引，排序和筛选都交给 SQLite
+        ResultIndex().close()
+        database = QSqlDatabase.addDatabase('QSQLITE', 'results')
+        database.setDatabaseName(RESULT_INDEX)
+        database.open()
+        model = QSqlTableModel(widget, database)
+        model.setTable('results')
+        model.setEditStrategy(QSqlTableModel.OnManualSubmit)
+        for col, header in ((1, '文件'), (4, '姓名'), (5, '时间'), (6, '得分'), (7, '总分')):
+            model.setHeaderData(col, Qt.Horizontal, header)
+        model.select()
+        self.resultModel = model
+
+        def filterChanged(text):
+            text = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace("'", "''")
+            model.setFilter(f"trainer LIKE '%{text}%' ESCAPE '\\' OR file LIKE '%{text}%' ESCAPE '\\'")
 
         def jsonFileDoubleClicked(index):
-            path = model.filePath(index)
+            path = model.record(index.row()).value('path')
             if os.path.exists(path):
-                dialog = ResultDetailDialog(path, self)
+                dialog = ResultDetailDialog(path, self, self.questionIndex, self.ioPool)
                 dialog.exec_()
 
+        self.resultStatusLabel = QLabel(self.resultStatus)
+        vbox.addWidget(self.resultStatusLabel)
+
+        filterInput = QLineEdit()
+        filterInput.setPlaceholderText('按姓名或文件名筛选')
+        filterInput.textChanged.connect(filterChanged)
+        vbox.addWidget(filterInput)
+
         table = QTableView()
-        table.resizeRowsToContents()
         table.setModel(model)
-        table.setRootIndex(model.index(RESULT_FOLDER))
-        for col in [1, 2]:
+        for col in [0, 2, 3]:
             table.hideColumn(col)
-        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        table.horizontalHeader().setStretchLastSection(True)
-        table.horizontalHeader().hide()
+        table.setSortingEnabled(True)
+        table.sortByColumn(5, Qt.DescendingOrder)
+        table.setEditTriggers(QTableView.NoEditTriggers)
+        table.setSelectionBehavior(QTableView.SelectRows)
+        table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         table.verticalHeader().hide()
         table.doubleClicked.connect(lambda index: jsonFileDoubleClicked(index))
 
@@ -432,6 +987,154 @@ class MainWindow(QMainWindow):
 
         return widget
 
+    def refreshResultIndex(self):
+        if not os.path.isdir(RESULT_FOLDER):
+            return
+        if self.indexing:
+            self.indexPending = True
+            return
+        self.indexing = True
+
+        # 在后台线程中增量更新索引，完成后通知界面刷新
+        def work():
+            from analytics import updateStats
+
+            changed = []
+            stats = None
+            # 改动的结果文件只解析一次，索引和作答统计共用解析结果
+            outcomes = {}
+            index = ResultIndex()
+            try:
+                changed, _ = index.update(RESULT_FOLDER, outcomes)
+                with tracing.span('updateAnswerStore') as span:
+                    stats = updateStats(RESULT_FOLDER, outcomes=outcomes)
+                    span.set(questions=len(stats.lookup))
+            finally:
+                index.close()
+                self.resultIndexUpdated.emit(changed, stats)
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def watchResultFolder(self):
+        if not os.path.isdir(RESULT_FOLDER):
+            return
+        # 短时间内的多次文件事件合并为一次索引更新
+        self.resultDebounce = QTimer(self)
+        self.resultDebounce.setSingleShot(True)
+        self.resultDebounce.setInterval(RESULT_DEBOUNCE_MS)
+        self.resultDebounce.timeout.connect(self.refreshResultIndex)
+        self.resultWatcher = QFileSystemWatcher([RESULT_FOLDER], self)
+        self.resultWatcher.directoryChanged.connect(lambda _: self.resultDebounce.start())
+        self.resultWatcher.fileChanged.connect(lambda _: self.resultDebounce.start())
+
+    def onResultIndexUpdated(self, changed, stats):
+        self.indexing = False
+        if self.resultModel is not None:
+            self.resultModel.select()
+        if stats is not None:
+            self.questionStats = stats
+            for model in self.sheetModels.values():
+                if model.statsShown:
+                    self.applyStats(model)
+
+        if changed:
+            latest = changed[-1]
+            self.resultStatus = f'新增或更新 {len(changed)} 条结果，最新：{latest[4] or latest[1]}'
+            if latest[6] is not None:
+                self.resultStatus += f'  得分：{latest[6]}/{latest[7]}'
+            if self.resultStatusLabel is not None:
+                self.resultStatusLabel.setText(self.resultStatus)
+        if self.resultWatcher is not None:
+            # 仍在写入、暂时无法解析的文件单独监视，写完后再解析
+            pending = [row[0] for row in changed if row[6] is None]
+            if pending:
+                self.resultWatcher.addPaths(pending)
+            # 已解析成功的文件不再单独监视，避免监视列表不断增长
+            watched = set(self.resultWatcher.files())
+            parsed = [row[0] for row in changed if row[6] is not None and row[0] in watched]
+            if parsed:
+                self.resultWatcher.removePaths(parsed)
+
+        if self.indexPending:
+            self.indexPending = False
+            self.refreshResultIndex()
+
+    def onProcessEvent(self, name, event, detail):
+        if event == 'starting':
+            text = '启动中'
+        elif event == 'ready':
+            text = f'就绪（{detail:.1f} 秒）'
+        elif event == 'crashed':
+            text = f'异常退出（{detail}）'
+        else:
+            text = '已退出'
+        self.processStatus[name] = text
+        if name in self.supervisor.stations:
+            self.refreshStationLabel()
+            return
+        labels = (('tracker', '追踪'), ('unreal', '应用'))
+        self.processStatusLabel.setText('  '.join(f'{label}：{self.processStatus[key]}'
+                                                  for key, label in labels if key in self.processStatus))
+
+    def onStationExported(self, name, text):
+        self.stationStatus[name] = text
+        self.refreshStationLabel()
+
+    def refreshStationLabel(self):
+        parts = []
+        for station in self.stations:
+            key = station['name']
+            texts = [text for text in (self.stationStatus.get(key), self.processStatus.get(key)) if text]
+            parts.append(f'{key}：{"，".join(texts) if texts else "未导出"}')
+        self.stationLabel.setText('  '.join(parts))
+
+    def createDiagnosticsPage(self):
+        widget = QWidget()
+        vbox = QVBoxLayout(widget)
+
+        diagnosticsLabel = QLabel('诊断信息')
+        diagnosticsLabel.setStyleSheet("font-weight:bold; margin-left:0px; margin-top:10px; margin-bottom:10px")
+        vbox.addWidget(diagnosticsLabel)
+        if not tracing.ENABLED:
+            vbox.addWidget(QLabel('追踪未启用，可在 settings.py 中设置 TRACE_ENABLED 或设置环境变量 STARTER_TRACE=1'))
+
+        summaryTable = QTableWidget(0, 4)
+        summaryTable.setHorizontalHeaderLabels(['操作', '次数', 'p50 (ms)', 'p95 (ms)'])
+        recentTable = QTableWidget(0, 5)
+        recentTable.setHorizontalHeaderLabels(['时间', '操作', '耗时 (ms)', '线程', '规模'])
+        for table in (summaryTable, recentTable):
+            table.setEditTriggers(QTableWidget.NoEditTriggers)
+            table.verticalHeader().hide()
+            table.horizontalHeader().setStretchLastSection(True)
+
+        def refresh():
+            entries = tracing.recentEntries()
+            summary = tracing.summarize(entries)
+            summaryTable.setRowCount(len(summary))
+            for row, (name, (count, p50, p95)) in enumerate(sorted(summary.items())):
+                for col, text in enumerate((name, str(count), f'{p50 * 1000:.1f}', f'{p95 * 1000:.1f}')):
+                    summaryTable.setItem(row, col, QTableWidgetItem(text))
+            recentTable.setRowCount(len(entries))
+            for row, entry in enumerate(reversed(entries)):
+                sizes = ', '.join(f'{key}={value}' for key, value in entry.items()
+                                  if key not in ('name', 'time', 'duration', 'thread', 'pid'))
+                for col, text in enumerate((entry['time'], entry['name'], f"{entry['duration'] * 1000:.1f}",
+                                            f"{entry['thread']} ({entry['pid']})", sizes)):
+                    recentTable.setItem(row, col, QTableWidgetItem(text))
+
+        self.refreshDiagnostics = refresh
+        refreshBtn = QPushButton('刷新')
+        refreshBtn.clicked.connect(refresh)
+        hbox = QHBoxLayout()
+        hbox.addWidget(refreshBtn)
+        hbox.addStretch(1)
+
+        vbox.addLayout(hbox)
+        vbox.addWidget(summaryTable, 1)
+        vbox.addWidget(recentTable, 2)
+
+        return widget
+
     def initUi(self):
         self.toolbar = self.addToolBar('')
         self.toolbar.setMovable(False)
@@ -444,25 +1147,39 @@ class MainWindow(QMainWindow):
         self.createAction('Level4', 4)
         self.toolbar.addSeparator()
         self.createAction('Result', 5)
+        self.toolbar.addSeparator()
+        searchInput = QLineEdit()
+        searchInput.setPlaceholderText('搜索题目')
+        searchInput.setMaximumWidth(240)
+        searchInput.textChanged.connect(self.onSearchTextChanged)
+        self.toolbar.addWidget(searchInput)
 
         self.stacked = QStackedWidget()
         self.stacked.addWidget(self.createEnvPage())
-        for i in (1, 2, 3, 4):
-            self.stacked.addWidget(self.createLevelPage(i))
-        self.stacked.addWidget(self.createResultPage())
-
-        okBtn = QPushButton("确认")
-        okBtn.clicked.connect(self.okButtonClicked)
+        self.pages[0] = self.stacked.widget(0)
+        for i in (1, 2, 3, 4, 5, 6, 7):
+            self.stacked.addWidget(QWidget())
+        # 诊断页面不在工具栏中显示，通过快捷键打开
+        QShortcut(QKeySequence('Ctrl+Shift+D'), self, lambda: self.showPage(6))
+
+        self.okBtn = QPushButton("确认")
+        self.okBtn.clicked.connect(self.okButtonClicked)
+        self.cancelBtn = QPushButton('取消')
+        self.cancelBtn.clicked.connect(self.cancelExport)
+        self.cancelBtn.hide()
+        self.exportLabel = QLabel()
         trackerBtn = QPushButton('启动追踪')
         def trackerBtnClicked():
-            if os.path.exists(TRACKER_APPLICATION):
-                subprocess.Popen(TRACKER_APPLICATION)
+            if self.supervisor.tracker.available():
+                self.supervisor.tracker.start()
         trackerBtn.clicked.connect(trackerBtnClicked)
         unrealBtn = QPushButton('启动应用')
         def unrealBtnClicked():
-            if os.path.exists(UNREAL_APPLICATION):
-                subprocess.Popen(UNREAL_APPLICATION)
+            if self.supervisor.unreal.available():
+                self.supervisor.unreal.start()
         unrealBtn.clicked.connect(unrealBtnClicked)
+        self.processStatusLabel = QLabel()
+        self.stationLabel = QLabel()
 
         style = QApplication.style()
         defaultLeft = style.pixelMetric(QStyle.PM_LayoutLeftMargin)
@@ -474,133 +1191,367 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout(central)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(self.stacked)
+        if self.stations:
+            stationBox = QHBoxLayout()
+            stationBox.setContentsMargins(defaultLeft, 0, defaultRight, 0)
+            stationBox.addWidget(self.stationLabel)
+            layout.addLayout(stationBox)
+            self.refreshStationLabel()
         bottom = QHBoxLayout()
         bottom.setContentsMargins(defaultLeft, defaultTop, defaultRight, defaultBottom)
-        bottom.addStretch(0)
-        bottom.addWidget(okBtn)
+        bottom.addWidget(self.processStatusLabel)
+        bottom.addStretch(1)
+        bottom.addWidget(self.exportLabel)
+        bottom.addWidget(self.cancelBtn)
+        bottom.addWidget(self.okBtn)
         bottom.addWidget(trackerBtn)
         bottom.addWidget(unrealBtn)
         layout.addLayout(bottom)
         self.setCentralWidget(central)
 
+    def settingInputs(self):
+        # settings.yaml 各项对应的控件
+        return {
+            'camera_settings': self.cameraSettingCheck,
+            'brightness': self.brightnessInput,
+            'contrast': self.contrastInput,
+            'white_balance': self.whiteBalanceInput,
+            'exposure': self.exposureInput,
+            'lift_bar': self.liftBarInput,
+            'left_bar': self.leftBarInput,
+            'right_bar': self.rightBarInput,
+            'up_bar': self.upBarInput,
+            'down_bar': self.downBarInput,
+            'camera0_show': self.camera0Check,
+            'camera1_show': self.camera1Check,
+            'camera2_show': self.camera2Check
+        }
+
+    def settingsData(self):
+        return {key: widget.isChecked() if isinstance(widget, QCheckBox) else widget.value()
+                for key, widget in self.settingInputs().items()}
+
+    def envSettings(self):
+        # 环境页面的全部取值，学员姓名除外
+        return {
+            'time': [self.timePicker.time().hour(), self.timePicker.time().minute()],
+            'weather': self.weatherPicker.currentIndex(),
+            'train_time': [self.trainTimeMinuteInput.value(), self.trainTimeSecondInput.value()],
+            'data': self.settingsData()
+        }
+
+    def restoreEnvSettings(self, settings):
+        if 'time' in settings:
+            self.timePicker.setTime(QTime(*settings['time']))
+        if 'weather' in settings:
+            self.weatherPicker.setCurrentIndex(settings['weather'])
+        if 'train_time' in settings:
+            self.trainTimeMinuteInput.setValue(settings['train_time'][0])
+            self.trainTimeSecondInput.setValue(settings['train_time'][1])
+        data = settings.get('data', {})
+        for key, widget in self.settingInputs().items():
+            if key not in data:
+                continue
+            if isinstance(widget, QCheckBox):
+                widget.setChecked(bool(data[key]))
+            else:
+                widget.setValue(int(data[key]))
+
+    def saveProfile(self, name):
+        from profiles import encodeProfile, loadProfiles, saveProfiles
+
+        name = name.strip()
+        if not name or self.pendingLevels > 0:
+            return False
+        levels = (self.level1Sheets, self.level2Sheets, self.level3Sheets, self.level4Sheets)
+        profiles = loadProfiles()
+        profiles[name] = encodeProfile(levels, self.envSettings())
+        saveProfiles(profiles)
+        return True
+
+    def deleteProfile(self, name):
+        from profiles import loadProfiles, saveProfiles
+
+        profiles = loadProfiles()
+        if profiles.pop(name, None) is not None:
+            saveProfiles(profiles)
+
+    def applyProfile(self, name):
+        # 所有关卡的勾选和分值一次性批量更新，题库增删的 id 按默认处理
+        from profiles import loadProfiles, profileSelection
+        from variants import applyVariant
+
+        profile = loadProfiles().get(name)
+        if profile is None or self.pendingLevels > 0:
+            return None
+        levels = (self.level1Sheets, self.level2Sheets, self.level3Sheets, self.level4Sheets)
+        with tracing.span('applyProfile') as span:
+            selection, added, removed = profileSelection(profile, levels)
+            applyVariant(levels, selection, self.sheetModels)
+            self.restoreEnvSettings(profile.get('settings', {}))
+            span.set(sheets=len(selection), added=added, removed=removed)
+        return added, removed
+
     def okButtonClicked(self):
-        time = self.timePicker.time().hour() * 100 + int(self.timePicker.time().minute() * 100 / 60)
+        time = encodeTime(self.timePicker.time().hour(), self.timePicker.time().minute())
         weather = self.weatherPicker.currentIndex()
         trainTime = self.trainTimeMinuteInput.value() * 60 + self.trainTimeSecondInput.value()
         name = self.nameInput.text()
-        with open(BINARY_OUTPUT, 'wb') as binaryFile:
-            packed = struct.pack('<iii', time, weather, trainTime)
-            binaryFile.write(packed)
-        binaryFile.close()
-        with open(NAME_OUTPUT, 'w', encoding='UTF-8') as nameFile:
-            nameFile.write(name)
-        nameFile.close()
-        with open(YAML_OUTPUT, 'w') as yamlFile:
-            data = {
-                'camera_settings': True if self.cameraSettingCheck.isChecked() else False,
-                'brightness': self.brightnessInput.value(),
-                'contrast': self.contrastInput.value(),
-                'white_balance': self.whiteBalanceInput.value(),
-                'exposure': self.exposureInput.value(),
-                'lift_bar': self.liftBarInput.value(),
-                'left_bar': self.leftBarInput.value(),
-                'right_bar': self.rightBarInput.value(),
-                'up_bar': self.upBarInput.value(),
-                'down_bar': self.downBarInput.value(),
-                'camera0_show': True if self.camera0Check.isChecked() else False,
-                'camera1_show': True if self.camera1Check.isChecked() else False,
-                'camera2_show': True if self.camera2Check.isChecked() else False
-            }
-            yaml.dump(data, yamlFile, default_flow_style=False, sort_keys=False)
-
-        with open(QUESTION1_OUTPUT, 'w', newline='') as csvFile:
-            writer = csv.writer(csvFile)
-            for level in (self.level1Sheets, self.level2Sheets, self.level3Sheets, self.level4Sheets):
-                if level is None:
-                    continue
-                for df in level.values():
-                    for index, row in df.iterrows():
-                        if row['required']:
-                            writer.writerow([str(row['id'])] + [str(row['score'])])
-        csvFile.close()
-
-        if os.path.exists(UNREAL_APPLICATION):
-            subprocess.Popen(UNREAL_APPLICATION)
-
-
-class ResultDetailDialog(QDialog):
-    def __init__(self, filePath, parent=None):
+        data = self.settingsData()
+        rows = questionRows((self.level1Sheets, self.level2Sheets, self.level3Sheets, self.level4Sheets))
+
+        if self.stations:
+            self.exportStations(time, weather, trainTime, name, data, rows)
+            return
+
+        # 热切换模式下，正在运行的模拟器直接从共享内存读取新会话，无需写文件和重启
+        if HANDOFF_ENABLED:
+            if self.handoffWriter is None:
+                self.handoffWriter = HandoffWriter()
+            with tracing.span('publishHandoff', questions=len(rows)):
+                self.handoffWriter.publish(sessionConfig(time, weather, trainTime, name, data, rows))
+            if self.supervisor.unreal.isRunning():
+                return
+
+        # 写文件和启动应用在后台线程中进行，完成前禁用确认按钮
+        self.okBtn.setEnabled(False)
+        self.cancelBtn.show()
+        self.exportLabel.setText('正在导出……')
+        cancel = threading.Event()
+        self.exportCancel = cancel
+
+        def progress(done, total):
+            self.exportProgress.emit(done, total)
+            return not cancel.is_set()
+
+        def work():
+            if not writeSession('.', time, weather, trainTime, name, data, rows, progress):
+                return False
+            # 应用已在运行时不会重复启动
+            if not cancel.is_set() and self.supervisor.unreal.available():
+                self.supervisor.unreal.start()
+            return not cancel.is_set()
+
+        self.exportFuture = self.ioPool.submit(work)
+        self.exportFuture.add_done_callback(self.exportJobDone)
+
+    def exportStations(self, timeOfDay, weather, trainTime, name, data, rows):
+        # 多工位模式：各工位的配置并行写入各自目录，再分别启动或通知模拟器
+        self.okBtn.setEnabled(False)
+        self.cancelBtn.show()
+        self.exportLabel.setText('正在导出……')
+        cancel = threading.Event()
+        self.exportCancel = cancel
+        for station in self.stations:
+            self.stationStatus[station['name']] = '导出中'
+        self.refreshStationLabel()
+
+        def stationJob(station):
+            key = station['name']
+            folder = station['folder']
+            process = self.supervisor.stations[key]
+            trainee = station.get('trainee') or name
+            start = time.perf_counter()
+            try:
+                if cancel.is_set():
+                    self.stationExported.emit(key, '已取消')
+                    return False
+                os.makedirs(folder, exist_ok=True)
+                with tracing.span('exportStation', station=key, questions=len(rows)):
+                    if HANDOFF_ENABLED:
+                        writer = self.stationWriters.get(key)
+                        if writer is None:
+                            writer = self.stationWriters[key] = HandoffWriter(os.path.join(folder, HANDOFF_FILE))
+                        writer.publish(sessionConfig(timeOfDay, weather, trainTime, trainee, data, rows))
+                        if process.isRunning():
+                            self.stationExported.emit(key, f'已通知（{(time.perf_counter() - start) * 1000:.0f} ms）')
+                            return True
+                    if not writeSession(folder, timeOfDay, weather, trainTime, trainee, data, rows,
+                                        lambda done, total: not cancel.is_set()):
+                        self.stationExported.emit(key, '已取消')
+                        return False
+                text = f'已导出（{(time.perf_counter() - start) * 1000:.0f} ms）'
+                if not cancel.is_set() and process.available():
+                    text += '' if process.start() else '，已在运行'
+                self.stationExported.emit(key, text)
+                return True
+            except Exception as e:
+                self.stationExported.emit(key, f'失败：{e}')
+                raise
+
+        def work():
+            with ThreadPoolExecutor(max_workers=len(self.stations)) as pool:
+                futures = [pool.submit(stationJob, station) for station in self.stations]
+            failed = sum(1 for future in futures if future.exception() is not None)
+            if failed:
+                raise RuntimeError(f'{failed} 个工位失败')
+            return all(future.result() for future in futures)
+
+        self.exportFuture = self.ioPool.submit(work)
+        self.exportFuture.add_done_callback(self.exportJobDone)
+
+    def exportJobDone(self, future):
+        # 运行在线程池中，通过信号转回界面线程
+        if future.cancelled():
+            self.exportFinished.emit('已取消')
+            return
+        try:
+            completed = future.result()
+        except Exception as e:
+            self.exportFinished.emit(f'导出失败：{e}')
+            return
+        self.exportFinished.emit('已导出' if completed else '已取消')
+
+    def cancelExport(self):
+        if self.exportCancel is not None:
+            self.exportCancel.set()
+        if self.exportFuture is not None:
+            self.exportFuture.cancel()
+
+    def onExportProgress(self, done, total):
+        if self.exportFuture is not None:
+            self.exportLabel.setText(f'正在导出 {done}/{total}')
+
+    def onExportFinished(self, message):
+        self.exportFuture = None
+        self.exportCancel = None
+        self.cancelBtn.hide()
+        self.exportLabel.setText(message)
+        self.okBtn.setEnabled(self.pendingLevels == 0)
+
+
+class ResultTreeNode:
+    def __init__(self, parent, row, type=None, rec=None, texts=None):
+        self.parent = parent
+        self.row = row
+        self.type = type
+        self.rec = rec
+        self.texts = texts
+        self.records = None
+        self.children = None
+
+
+class ResultTreeModel(QAbstractItemModel):
+    # 题目节点在所属分组展开时创建，选项节点在题目展开时创建
+    def __init__(self, answers, parent=None, questionIndex=None):
         super().__init__(parent)
-        self.setWindowTitle("训练结果")
-        self.resize(1200, 800)
-        vbox = QVBoxLayout(self)
-        tree = QTreeWidget()
-        tree.setHeaderLabels(['题目', '描述', '用户答案', '正确答案', '是否正确'])
-        vbox.addWidget(tree)
-
-        with open(filePath, 'r', encoding='UTF-16') as jsonFile:
-            data = json.load(jsonFile)
-
-        metadata = data.get('metadata', '')
-        name = metadata.get('trainer', 'UnKnown')
+        self.questionIndex = questionIndex
+        self.headers = ['题目', '描述', '用户答案', '正确答案', '是否正确']
+        typeNames = {'SingleChoice': '单选题', 'MultipleChoice': '多选题', 'SceneTraining': '场景题',
+                     'TrueFalse': '判断题'}
 
         groups = {}
-        for rec in data.get("answers", []):
+        for rec in answers:
             t = rec.get("type", "Unknown")
             groups.setdefault(t, []).append(rec)
 
-        tree.clear()
-        for type, items in groups.items():
-            if type == 'SingleChoice':
-                parent = QTreeWidgetItem(['单选题'])
-            elif type == 'MultipleChoice':
-                parent = QTreeWidgetItem(['多选题'])
-            elif type == 'SceneTraining':
-                parent = QTreeWidgetItem(['场景题'])
-            elif type == 'TrueFalse':
-                parent = QTreeWidgetItem(['判断题'])
-            tree.addTopLevelItem(parent)
-            for rec in items:
-                id = rec.get('question_id', '')
-                description = rec.get('description', '')
-                userAnswer = rec.get('user_answer', '')
-                correctAnswer = rec.get('correct_answer', rec.get('correct_answers', ''))
-                questionContent = rec.get('question_content', None)
-
-                isCorrect = False
-                if type == "SingleChoice":
-                    isCorrect = (userAnswer == correctAnswer)
-                elif type == "MultipleChoice":
-                    isCorrect = isinstance(userAnswer, list) and isinstance(correctAnswer, list) and set(
-                        userAnswer) == set(correctAnswer)
-                elif type == "SceneTraining":
-                    isCorrect = (userAnswer == "True")
-                elif type == "TrueFalse":
-                    isCorrect = (userAnswer == correctAnswer)
-
-                questionItem = QTreeWidgetItem([
-                    id, description, str(userAnswer), str(correctAnswer),
-                    "✓" if isCorrect else "✗"
-                ])
-                parent.addChild(questionItem)
+        self.root = ResultTreeNode(None, 0)
+        self.root.children = []
+        for row, (type, items) in enumerate(groups.items()):
+            node = ResultTreeNode(self.root, row, type, texts=[typeNames.get(type, type)])
+            node.records = items
+            self.root.children.append(node)
 
+    def nodeOf(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def childrenOf(self, node):
+        if node.children is None:
+            if node.records is not None:
+                node.children = [ResultTreeNode(node, row, node.type, rec) for row, rec in enumerate(node.records)]
+            else:
+                questionContent = node.rec.get('question_content', None) if node.rec is not None else None
                 if isinstance(questionContent, list):
-                    for index, option in enumerate(questionContent, 0):
-                        optionItem = QTreeWidgetItem([f'选项{index}：', str(option)])
-                        questionItem.addChild(optionItem)
-                elif questionContent is not None:
-                    questionItem.setText(1, f"描述：{description}\n内容：{questionContent}")
-            parent.setExpanded(True)
-        tree.header().setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        tree.header().setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        tree.header().setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        tree.header().setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        tree.header().setStretchLastSection(True)
+                    node.children = [ResultTreeNode(node, index, texts=[f'选项{index}：', str(option)])
+                                     for index, option in enumerate(questionContent, 0)]
+                else:
+                    node.children = []
+        return node.children
+
+    def questionTexts(self, node):
+        rec = node.rec
+        id = rec.get('question_id', '')
+        description = rec.get('description', '')
+        userAnswer = rec.get('user_answer', '')
+        correctAnswer = rec.get('correct_answer', rec.get('correct_answers', ''))
+        questionContent = rec.get('question_content', None)
+
+        isCorrect = isAnswerCorrect(node.type, userAnswer, correctAnswer)
+        if questionContent is not None and not isinstance(questionContent, list):
+            description = f"描述：{description}\n内容：{questionContent}"
+        return [id, description, str(userAnswer), str(correctAnswer), "✓" if isCorrect else "✗"]
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self.childrenOf(self.nodeOf(parent))[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer().parent
+        if node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.childrenOf(self.nodeOf(parent)))
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.headers)
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.nodeOf(parent)
+        if node.children is not None:
+            return len(node.children) > 0
+        if node.rec is not None:
+            questionContent = node.rec.get('question_content', None)
+            return isinstance(questionContent, list) and len(questionContent) > 0
+        return node.records is not None and len(node.records) > 0
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.ToolTipRole and node.rec is not None and self.questionIndex is not None:
+            # 显示题库中对应题目的原文
+            return self.questionIndex.text(node.rec.get('question_id', ''))
+        if role != Qt.DisplayRole:
+            return None
+        if node.texts is None:
+            node.texts = self.questionTexts(node)
+        col = index.column()
+        return node.texts[col] if col < len(node.texts) else None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+
+class ResultDetailDialog(QDialog):
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, filePath, parent=None, questionIndex=None, pool=None):
+        super().__init__(parent)
+        self.setWindowTitle("训练结果")
+        self.resize(1200, 800)
+        self.parentWindow = parent
+        self.questionIndex = questionIndex
+        self.answerCount = None
+        self.openStart = time.perf_counter()
+        vbox = QVBoxLayout(self)
+        # 先显示只有表头的空树和提示，结果文件在后台解析完成后再填充
+        self.tree = QTreeView()
+        self.tree.setModel(ResultTreeModel([], self.tree, questionIndex))
+        vbox.addWidget(self.tree)
 
-        score, possible = self.computeScore(data.get('answers', []))
         footer = QHBoxLayout()
-        scoreLabel = QLabel(f'姓名：{name}  得分：{score}/{possible}')
-        footer.addWidget(scoreLabel)
+        self.scoreLabel = QLabel('正在读取结果文件……')
+        footer.addWidget(self.scoreLabel)
         footer.addStretch(1)
         closeBtn = QPushButton('关闭')
         closeBtn.clicked.connect(lambda: self.close())
@@ -608,38 +1559,75 @@ class ResultDetailDialog(QDialog):
 
         vbox.addLayout(footer)
 
-    def computeScore(self, answers):
-        totalScore = 0  # 用户实际得分
-        totalPossible = 0  # 所有题目分值之和
-
-        for rec in answers:
-            type = rec.get("type")
-            weight = rec.get("score", 0)
-            totalPossible += weight
-
-            ua = rec.get("user_answer")
-            ca = rec.get("correct_answer", rec.get("correct_answers"))
-
-            earned = 0
-            if type == "SingleChoice":
-                if ua == ca:
-                    earned = weight
-
-            elif type == "MultipleChoice":
-                if isinstance(ua, list) and isinstance(ca, list) and set(ua) == set(ca):
-                    earned = weight
+        self.loaded.connect(self.populate)
+        self.failed.connect(lambda message: self.scoreLabel.setText(f'读取失败：{message}'))
+        self.bytes = os.path.getsize(filePath) if os.path.exists(filePath) else 0
+        ownPool = pool is None
+        if ownPool:
+            pool = ThreadPoolExecutor(max_workers=1)
+        self.future = pool.submit(self.loadResult, filePath)
+        self.future.add_done_callback(self.jobDone)
+        if ownPool:
+            pool.shutdown(wait=False)
+
+    def loadResult(self, filePath):
+        data = readResult(filePath)
+        answers = data.get('answers', [])
+        return data.get('metadata', {}), answers, self.computeScore(answers)
+
+    def jobDone(self, future):
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            signal, value = self.failed, str(e)
+        else:
+            signal, value = self.loaded, result
+        try:
+            signal.emit(value)
+        except RuntimeError:
+            # 对话框已被销毁
+            pass
+
+    def populate(self, result):
+        metadata, answers, (score, possible) = result
+        tree = self.tree
+        name = metadata.get('trainer', 'UnKnown')
 
-            elif type == "SceneTraining":
-                if ua == "True":
-                    earned = weight
+        self.answerCount = len(answers)
+        model = ResultTreeModel(answers, tree, self.questionIndex)
+        tree.setModel(model)
+
+        def questionDoubleClicked(index):
+            # 双击题目跳转到题库中对应的位置
+            node = index.internalPointer()
+            if node.rec is not None and hasattr(self.parentWindow, 'jumpToQuestionId'):
+                if self.parentWindow.jumpToQuestionId(node.rec.get('question_id', '')):
+                    self.close()
+
+        tree.doubleClicked.connect(questionDoubleClicked)
+        for row in range(model.rowCount()):
+            tree.expand(model.index(row, 0))
+
+        # 列宽只按前若干行估算，不再测量全部条目
+        tree.header().setResizeContentsPrecision(50)
+        for col in range(4):
+            tree.resizeColumnToContents(col)
+        tree.header().setStretchLastSection(True)
 
-            elif type == "TrueFalse":
-                if ua == ca:
-                    earned = weight
+        self.scoreLabel.setText(f'姓名：{name}  得分：{score}/{possible}')
+        tracing.record('openResultDialog', time.perf_counter() - self.openStart, bytes=self.bytes,
+                       answers=self.answerCount)
 
-            totalScore += earned
+    def done(self, result):
+        # 关闭时取消尚未开始的解析
+        if self.future is not None:
+            self.future.cancel()
+        super().done(result)
 
-        return totalScore, totalPossible
+    def computeScore(self, answers):
+        return computeScore(answers)
 
 
 if __name__ == '__main__':
@@ -647,4 +1635,5 @@ if __name__ == '__main__':
     window = MainWindow()
     window.resize(1200, 800)
     window.show()
+    QTimer.singleShot(0, lambda: profiling.record('first paint', profiling.START))
     sys.exit(app.exec_())
@@ -0,0 +1,79 @@
+import base64
+import json
+
+from bank import rowKeys
+from session import writeFileAtomic
+from settings import *
+
+
+def encodeSheet(df):
+    # 每行一位勾选状态，按行顺序压缩为位图；分值只记录非零差值，以行在 ids 中的位置为键
+    # 没有 id 的行（首个 id 之前的 Content 行）以 str() 后的 'nan' 记录，同样按出现次序对齐
+    import numpy as np
+
+    ids = [str(value) for value in df['id'].tolist()]
+    required = df['required'].to_numpy(dtype=bool)
+    deltas = df['score'].to_numpy(dtype=np.int64) - DEFAULT_SCORE
+    return {
+        'ids': ids,
+        'required': base64.b64encode(np.packbits(required).tobytes()).decode('ascii'),
+        'scores': {str(position): delta for position, delta in enumerate(deltas.tolist()) if delta}
+    }
+
+
+def decodeSheet(entry, df):
+    # 按 (id, 出现次序) 对齐：方案中已删除的行忽略，工作簿中新增的行不勾选、使用默认分值
+    import numpy as np
+
+    count = len(entry['ids'])
+    bits = np.unpackbits(np.frombuffer(base64.b64decode(entry['required']), dtype=np.uint8), count=count)
+    required = np.append(bits.astype(bool), False)
+    deltas = np.zeros(count + 1, dtype=np.int64)
+    if entry['scores']:
+        positions = np.fromiter(map(int, entry['scores']), dtype=np.int64, count=len(entry['scores']))
+        deltas[positions] = np.fromiter(entry['scores'].values(), dtype=np.int64, count=len(positions))
+    rows = rowKeys(entry['ids']).get_indexer(rowKeys(df['id'].tolist()))
+    matched = int((rows >= 0).sum())
+    return (required[rows], np.clip(DEFAULT_SCORE + deltas[rows], 0, 100),
+            len(df) - matched, count - matched)
+
+
+def encodeProfile(levels, settings):
+    sheets = {}
+    for level, levelSheets in enumerate(levels, 1):
+        if levelSheets is None:
+            continue
+        sheets[str(level)] = {name: encodeSheet(df) for name, df in levelSheets.items() if 'id' in df.columns}
+    return {'settings': settings, 'levels': sheets}
+
+
+def profileSelection(profile, levels):
+    # 返回与 variants.applyVariant 相同结构的选择，以及新增和缺失的题目数
+    selection = {}
+    added = 0
+    removed = 0
+    for level, levelSheets in enumerate(levels, 1):
+        if levelSheets is None:
+            continue
+        entries = profile['levels'].get(str(level), {})
+        for name, df in levelSheets.items():
+            if 'id' not in df.columns:
+                continue
+            entry = entries.get(name, {'ids': [], 'required': '', 'scores': {}})
+            required, scores, sheetAdded, sheetRemoved = decodeSheet(entry, df)
+            selection[(level, name)] = (required, scores)
+            added += sheetAdded
+            removed += sheetRemoved
+    return selection, added, removed
+
+
+def loadProfiles(path=PROFILE_FILE):
+    try:
+        with open(path, 'r', encoding='UTF-8') as profileFile:
+            return json.load(profileFile)
+    except (OSError, ValueError):
+        return {}
+
+
+def saveProfiles(profiles, path=PROFILE_FILE):
+    writeFileAtomic(path, json.dumps(profiles, ensure_ascii=False, separators=(',', ':')).encode('UTF-8'))
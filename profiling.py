@@ -0,0 +1,29 @@
+import os
+import sys
+import time
+
+# 启动耗时分析：设置环境变量 STARTER_PROFILE=1 或使用 --profile 参数启动
+START = time.perf_counter()
+ENABLED = os.environ.get('STARTER_PROFILE', '') not in ('', '0') or '--profile' in sys.argv
+
+
+def record(name, start, end=None):
+    if not ENABLED:
+        return
+    if end is None:
+        end = time.perf_counter()
+    print(f'[profile] +{(end - START) * 1000:8.1f} ms  {name}: {(end - start) * 1000:.1f} ms', file=sys.stderr)
+
+
+class span:
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.start)
+        return False
@@ -0,0 +1,78 @@
+TEXT_COLUMNS = ('id', 'Question', 'Content')
+
+
+def grams(text):
+    # 单字和相邻两字作为倒排索引的词项，中英文统一处理
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+# 单个关卡的题目索引，可在加载题库的子进程中构建后整体传回
+class LevelIndex:
+    def __init__(self, level, sheets):
+        self.level = level
+        self.locations = []  # 文档序号 -> (工作表, 行)
+        self.texts = []
+        self.lowered = []
+        self.ids = {}
+        self.postings = {}
+
+        for sheet, df in sheets.items():
+            columns = [df[column].tolist() for column in TEXT_COLUMNS if column in df.columns]
+            ids = df['id'].tolist() if 'id' in df.columns else [None] * len(df)
+            for row in range(len(df)):
+                doc = len(self.locations)
+                text = ' '.join(values[row] for values in columns if isinstance(values[row], str))
+                lowered = text.lower()
+                self.locations.append((sheet, row))
+                self.texts.append(text)
+                self.lowered.append(lowered)
+                if isinstance(ids[row], str):
+                    self.ids.setdefault(ids[row], doc)
+                for gram in grams(lowered):
+                    self.postings.setdefault(gram, []).append(doc)
+
+    def search(self, query):
+        # 取最短的倒排表作为候选，再用子串匹配确认
+        terms = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+        lists = [self.postings.get(term, ()) for term in terms]
+        candidates = min(lists, key=len)
+        return [doc for doc in candidates if query in self.lowered[doc]]
+
+
+class QuestionIndex:
+    def __init__(self):
+        self.levels = {}
+
+    def setLevel(self, levelIndex):
+        self.levels[levelIndex.level] = levelIndex
+
+    def locate(self, id):
+        for level in sorted(self.levels):
+            levelIndex = self.levels[level]
+            doc = levelIndex.ids.get(id)
+            if doc is not None:
+                sheet, row = levelIndex.locations[doc]
+                return level, sheet, row
+        return None
+
+    def text(self, id):
+        for level in sorted(self.levels):
+            levelIndex = self.levels[level]
+            doc = levelIndex.ids.get(id)
+            if doc is not None:
+                return levelIndex.texts[doc]
+        return None
+
+    def search(self, query, limit=None):
+        query = query.strip().lower()
+        if not query:
+            return []
+        results = []
+        for level in sorted(self.levels):
+            levelIndex = self.levels[level]
+            for doc in levelIndex.search(query):
+                sheet, row = levelIndex.locations[doc]
+                results.append((level, sheet, row, levelIndex.texts[doc]))
+                if limit is not None and len(results) >= limit:
+                    return results
+        return results
@@ -0,0 +1,57 @@
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from results import computeScore, readResult
+from settings import *
+
+
+def readWeights(path):
+    # 与导出的 questions.csv 格式相同：每行为题目 id 和分值
+    weights = {}
+    with open(path, 'r', newline='') as csvFile:
+        for row in csv.reader(csvFile):
+            if len(row) >= 2:
+                weights[row[0]] = int(row[1])
+    return weights
+
+
+def gradeFile(path, weights=None):
+    try:
+        data = readResult(path)
+        trainer = data.get('metadata', {}).get('trainer', 'UnKnown')
+        score, possible = computeScore(data.get('answers', []), weights)
+        return os.path.basename(path), trainer, score, possible, ''
+    except (OSError, ValueError, AttributeError, TypeError) as e:
+        return os.path.basename(path), '', '', '', str(e)
+
+
+def regrade(folder, output, weights=None, workers=None):
+    paths = sorted(entry.path for entry in os.scandir(folder)
+                   if entry.is_file() and entry.name.lower().endswith('.json'))
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(gradeFile, paths, [weights] * len(paths),
+                             chunksize=max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))))
+    elapsed = time.perf_counter() - start
+
+    with open(output, 'w', newline='', encoding='UTF-8') as csvFile:
+        writer = csv.writer(csvFile)
+        writer.writerow(['file', 'trainer', 'score', 'possible', 'error'])
+        writer.writerows(rows)
+    return len(paths), elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='批量重新计算训练结果得分')
+    parser.add_argument('folder', nargs='?', default=RESULT_FOLDER)
+    parser.add_argument('-w', '--weights', help='题目分值文件，格式与 questions.csv 相同')
+    parser.add_argument('-o', '--output', default='scores.csv')
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    count, elapsed = regrade(args.folder, args.output,
+                             readWeights(args.weights) if args.weights else None, args.jobs)
+    print(f'已评分 {count} 个文件，用时 {elapsed:.2f} 秒，{count / max(elapsed, 1e-9):.1f} 个文件/秒')
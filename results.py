@@ -0,0 +1,159 @@
+import gzip
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from settings import *
+
+RESULT_FORMATS = ('utf16', 'utf8', 'gzip', 'msgpack')
+# JSON 文本可能的首字符：空白、对象或数组
+JSON_START = b' \t\r\n{['
+
+
+def decodeResult(raw):
+    # 按文件头识别格式：gzip、UTF-16/UTF-8 JSON 或 msgpack 二进制，内容结构相同
+    if raw[:2] == b'\x1f\x8b':
+        try:
+            return decodeResult(gzip.decompress(raw))
+        except (OSError, EOFError, zlib.error) as e:
+            raise ValueError(f'gzip 数据损坏：{e}')
+    if raw[:2] in (b'\xff\xfe', b'\xfe\xff'):
+        return json.loads(raw.decode('UTF-16'))
+    if raw[:3] == b'\xef\xbb\xbf':
+        return json.loads(raw[3:].decode('UTF-8'))
+    # 无 BOM 的 UTF-16：JSON 以 ASCII 字符开头，LE 的第二个字节、BE 的第一个字节为 0
+    if len(raw) >= 2 and raw[1] == 0 and raw[0] in JSON_START:
+        return json.loads(raw.decode('UTF-16-LE'))
+    if len(raw) >= 2 and raw[0] == 0 and raw[1] in JSON_START:
+        return json.loads(raw.decode('UTF-16-BE'))
+    if raw.lstrip()[:1] in (b'{', b'['):
+        return json.loads(raw.decode('UTF-8'))
+    if raw[:1] and (0x80 <= raw[0] <= 0x8f or raw[0] in (0xde, 0xdf)):
+        try:
+            import msgpack
+        except ImportError:
+            raise ValueError('读取二进制结果文件需要安装 msgpack')
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    raise ValueError('无法识别的结果文件格式')
+
+
+def encodeResult(data, format):
+    if format == 'utf16':
+        return json.dumps(data, ensure_ascii=False).encode('UTF-16')
+    if format == 'utf8':
+        return json.dumps(data, ensure_ascii=False).encode('UTF-8')
+    if format == 'gzip':
+        return gzip.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('UTF-8'), 6)
+    if format == 'msgpack':
+        import msgpack
+
+        return msgpack.packb(data, use_bin_type=True)
+    raise ValueError(f'未知的结果文件格式：{format}')
+
+
+def readResult(path):
+    with open(path, 'rb') as resultFile:
+        return decodeResult(resultFile.read())
+
+
+def isAnswerCorrect(type, userAnswer, correctAnswer):
+    if type == "SingleChoice":
+        return userAnswer == correctAnswer
+    elif type == "MultipleChoice":
+        return isinstance(userAnswer, list) and isinstance(correctAnswer, list) and set(
+            userAnswer) == set(correctAnswer)
+    elif type == "SceneTraining":
+        return userAnswer == "True"
+    elif type == "TrueFalse":
+        return userAnswer == correctAnswer
+    return False
+
+
+def computeScore(answers, weights=None):
+    totalScore = 0  # 用户实际得分
+    totalPossible = 0  # 所有题目分值之和
+
+    for rec in answers:
+        weight = rec.get("score", 0)
+        if weights is not None:
+            weight = weights.get(rec.get("question_id"), weight)
+        totalPossible += weight
+
+        ua = rec.get("user_answer")
+        ca = rec.get("correct_answer", rec.get("correct_answers"))
+        if isAnswerCorrect(rec.get("type"), ua, ca):
+            totalScore += weight
+
+    return totalScore, totalPossible
+
+
+def answerOutcomes(answers):
+    # 每条作答记录的 (题目 id, 是否正确, 分值)，判定规则与 computeScore 相同
+    return [(rec.get("question_id"),
+             isAnswerCorrect(rec.get("type"), rec.get("user_answer"),
+                             rec.get("correct_answer", rec.get("correct_answers"))),
+             rec.get("score", 0))
+            for rec in answers]
+
+
+# 训练结果的本地索引，按文件大小和修改时间增量更新
+class ResultIndex:
+    def __init__(self, path=RESULT_INDEX):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'path TEXT PRIMARY KEY, file TEXT, size INTEGER, mtime INTEGER, '
+            'trainer TEXT, timestamp TEXT, score INTEGER, possible INTEGER)'
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, folder, outcomes=None):
+        # outcomes 不为 None 时收集改动文件的作答结果，供作答统计复用而不必再次解析
+        known = {path: (size, mtime) for path, size, mtime in
+                 self.connection.execute('SELECT path, size, mtime FROM results')}
+        seen = set()
+        changed = []
+        for entry in os.scandir(folder):
+            if not entry.is_file() or not entry.name.lower().endswith('.json'):
+                continue
+            stat = entry.stat()
+            seen.add(entry.path)
+            if known.get(entry.path) == (stat.st_size, stat.st_mtime_ns):
+                continue
+            changed.append(self.indexFile(entry.path, stat, outcomes))
+
+        removed = [(path,) for path in known if path not in seen]
+        self.connection.executemany('DELETE FROM results WHERE path = ?', removed)
+        self.connection.commit()
+        return changed, len(removed)
+
+    def indexFile(self, path, stat=None, outcomes=None):
+        if stat is None:
+            stat = os.stat(path)
+        try:
+            data = readResult(path)
+            metadata = data.get('metadata', {})
+            trainer = metadata.get('trainer', 'UnKnown')
+            timestamp = metadata.get('timestamp')
+            rows = answerOutcomes(data.get('answers', []))
+            score = sum(weight for _, correct, weight in rows if correct)
+            possible = sum(weight for _, _, weight in rows)
+        except (OSError, ValueError, AttributeError, TypeError):
+            # 无法解析的文件也记录下来，避免每次都重新读取
+            trainer, timestamp, score, possible = None, None, None, None
+            rows = []
+        if outcomes is not None:
+            outcomes[path] = ((stat.st_size, stat.st_mtime_ns), rows)
+        if timestamp is None:
+            timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stat.st_mtime))
+        row = (path, os.path.basename(path), stat.st_size, stat.st_mtime_ns,
+               trainer, str(timestamp), score, possible)
+        self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)', row)
+        return row
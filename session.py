@@ -0,0 +1,202 @@
+import csv
+import hashlib
+import io
+import json
+import locale
+import os
+import struct
+import time
+
+import tracing
+from settings import *
+
+WEATHERS = ['晴', '多云', '雾', '雷', '雷雨', '雪', '雨', '霜']
+TIME_PRESETS = {'黎明': (6, 45), '黄昏': (17, 30), '白天': (12, 0), '夜晚': (0, 0)}
+
+# 与环境设置页面各控件的默认值一致
+DEFAULT_SETTINGS = {
+    'camera_settings': True,
+    'brightness': 0,
+    'contrast': 0,
+    'white_balance': 6500,
+    'exposure': -8,
+    'lift_bar': 40,
+    'left_bar': 130,
+    'right_bar': 90,
+    'up_bar': 110,
+    'down_bar': 70,
+    'camera0_show': True,
+    'camera1_show': True,
+    'camera2_show': True
+}
+
+
+def encodeTime(hour, minute):
+    return hour * 100 + int(minute * 100 / 60)
+
+
+def questionRows(levels):
+    import pandas as pd
+
+    # 一次性筛选所有关卡、所有工作表中勾选的题目，只保留 id 和分值两列
+    frames = []
+    for level in levels:
+        if level is None:
+            continue
+        for df in level.values():
+            frames.append(df.loc[df['required'].to_numpy(dtype=bool), ['id', 'score']])
+    if not frames:
+        return []
+    selected = pd.concat(frames, ignore_index=True)
+    ids = [str(value) for value in selected['id'].tolist()]
+    scores = [str(value) for value in selected['score'].tolist()]
+    return list(zip(ids, scores))
+
+
+def writeQuestions(levels, path=QUESTION1_OUTPUT):
+    rows = questionRows(levels)
+    writeQuestionRows(rows, path)
+    return len(rows)
+
+
+def textBytes(text, encoding=None):
+    # 与以文本模式写文件的结果一致：换行按平台转换，默认使用系统编码
+    return text.replace('\n', os.linesep).encode(encoding or locale.getpreferredencoding(False))
+
+
+def questionBytes(rows):
+    buffer = io.StringIO(newline='')
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode(locale.getpreferredencoding(False))
+
+
+def replaceFile(source, target, retries=20):
+    # Windows 上目标文件正被模拟器打开时替换会失败，稍后重试
+    for attempt in range(retries):
+        try:
+            os.replace(source, target)
+            return
+        except PermissionError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.05)
+
+
+def writeFileAtomic(path, content):
+    # 先写临时文件再替换，读取方只会看到旧文件或完整的新文件
+    with open(path + '.tmp', 'wb') as outputFile:
+        outputFile.write(content)
+    replaceFile(path + '.tmp', path)
+
+
+def writeQuestionRows(rows, path=QUESTION1_OUTPUT):
+    writeFileAtomic(path, questionBytes(rows))
+
+
+def readManifest(folder):
+    try:
+        with open(os.path.join(folder, MANIFEST_OUTPUT), 'r', encoding='UTF-8') as manifestFile:
+            manifest = json.load(manifestFile)
+        return int(manifest['generation']), dict(manifest['files'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0, {}
+
+
+def fileSize(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def writeSession(folder, time, weather, trainTime, name, data, rows, progress=None):
+    # 输出模拟器读取的四个文件：时间天气、姓名、相机与阈值设置、题目
+    # 内容未变的文件不重写；最后写入清单，记录各文件哈希、本次改动的文件和递增的会话代数
+    # 每处理完一个文件调用 progress(已完成, 总数)，返回 False 时停止，清单保持不变
+    import yaml
+
+    outputs = (BINARY_OUTPUT, NAME_OUTPUT, YAML_OUTPUT, QUESTION1_OUTPUT)
+    contents = (
+        struct.pack('<iii', time, weather, trainTime),
+        textBytes(name, 'UTF-8'),
+        textBytes(yaml.dump(data, default_flow_style=False, sort_keys=False)),
+        questionBytes(rows)
+    )
+    generation, previous = readManifest(folder)
+    hashes = {}
+    changed = []
+    with tracing.span('writeSession', rows=len(rows)) as span:
+        for done, (output, content) in enumerate(zip(outputs, contents), 1):
+            path = os.path.join(folder, output)
+            hashes[output] = hashlib.sha256(content).hexdigest()
+            if previous.get(output) != hashes[output] or fileSize(path) != len(content):
+                writeFileAtomic(path, content)
+                changed.append(output)
+            if progress is not None and progress(done, len(outputs)) is False:
+                span.set(cancelled=done)
+                return False
+        manifest = {'generation': generation + 1, 'files': hashes, 'changed': changed}
+        writeFileAtomic(os.path.join(folder, MANIFEST_OUTPUT),
+                        json.dumps(manifest, ensure_ascii=False, indent=2).encode('UTF-8'))
+        span.set(bytes=sum(len(content) for content in contents), changed=len(changed))
+    return True
+
+
+def sessionConfig(time, weather, trainTime, name, data, rows):
+    # 热切换模式下发布到共享内存的完整会话配置，内容与四个输出文件一致
+    return {
+        'time': time,
+        'weather': weather,
+        'train_time': trainTime,
+        'name': name,
+        'settings': data,
+        'questions': [[id, int(score)] for id, score in rows]
+    }
+
+
+def writeQuestionsIterrows(levels, path):
+    # 旧的逐行导出方式，仅用于性能对比
+    with open(path, 'w', newline='') as csvFile:
+        writer = csv.writer(csvFile)
+        for level in levels:
+            if level is None:
+                continue
+            for df in level.values():
+                for index, row in df.iterrows():
+                    if row['required']:
+                        writer.writerow([str(row['id'])] + [str(row['score'])])
+
+
+def exportReport(levels, folder, repeat=5):
+    oldPath = os.path.join(folder, 'questions.iterrows.csv')
+    newPath = os.path.join(folder, 'questions.vectorized.csv')
+
+    def best(func, path):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(levels, path)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    oldTime = best(writeQuestionsIterrows, oldPath)
+    newTime = best(writeQuestions, newPath)
+    with open(oldPath, 'rb') as oldFile, open(newPath, 'rb') as newFile:
+        identical = oldFile.read() == newFile.read()
+    rows = sum(len(df) for level in levels if level is not None for df in level.values())
+    return (f'题目总行数：{rows}\n'
+            f'iterrows 导出：{oldTime * 1000:.1f} ms\n'
+            f'批量导出：{newTime * 1000:.1f} ms（{oldTime / max(newTime, 1e-9):.1f} 倍）\n'
+            f'输出是否一致：{"是" if identical else "否"}')
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    from bank import BankCache
+
+    cache = BankCache()
+    levels = [cache.load(excel) if os.path.exists(excel) else None
+              for excel in (LEVEL_1_EXCEL, LEVEL_2_EXCEL, LEVEL_3_EXCEL, LEVEL_4_EXCEL)]
+    with tempfile.TemporaryDirectory() as folder:
+        print(exportReport(levels, folder))
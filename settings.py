@@ -16,8 +16,50 @@ BINARY_OUTPUT = "timeandweather.bin"
 QUESTION1_OUTPUT = "questions.csv"
 QUESTION2_OUTPUT = "questions.csv"
 YAML_OUTPUT = "settings.yaml"
+# 记录各输出文件哈希和会话代数，模拟器据此只重新读取有变化的文件
+MANIFEST_OUTPUT = "manifest.json"
 
 RESULT_FOLDER = "C:\\Users\\17744\\Documents\\WeChat Files\\wxid_nbu98k2c98gz22\\FileStorage\\File\\2025-04"
 
 TRACKER_APPLICATION = ""
-UNREAL_APPLICATION = ""
\ No newline at end of file
+UNREAL_APPLICATION = ""
+
+CACHE_FOLDER = "cache"
+RESULT_INDEX = "results.db"
+RESULT_DEBOUNCE_MS = 1000
+# 按题目汇总作答情况的列式存储
+ANSWER_STORE = "answers.npz"
+
+TRACE_ENABLED = False
+TRACE_LOG = "trace.jsonl"
+TRACE_LOG_MAX_BYTES = 5 * 1024 * 1024
+TRACE_RECENT = 1000
+
+# 外部程序就绪检测：输出中出现指定文本，或指定文件出现/更新；都为空时启动即视为就绪
+TRACKER_READY_MARKER = ""
+TRACKER_READY_FILE = ""
+UNREAL_READY_MARKER = ""
+UNREAL_READY_FILE = ""
+TRACKER_PREWARM = False
+PROCESS_MAX_RESTARTS = 3
+
+# 热切换模式：确认时把会话配置写入共享内存文件，已运行的模拟器无需重启即可读取
+HANDOFF_ENABLED = False
+HANDOFF_FILE = "session.mmap"
+HANDOFF_SIZE = 1024 * 1024
+
+# 多工位模式：每个工位的输出目录、模拟器程序和学员姓名（为空时使用界面中的姓名）。
+# 列表为空时只向当前目录输出并启动 UNREAL_APPLICATION，例如：
+# STATIONS = [{"name": "1号机", "folder": "station1", "application": "D:/Sim1/Sim.exe", "trainee": ""}]
+STATIONS = []
+
+SEARCH_LIMIT = 500
+RELOAD_DEBOUNCE_MS = 1000
+
+# 题目加载时的默认分值，随机抽题和保存方案都以它为基准
+DEFAULT_SCORE = 10
+# 随机抽题时每个工作表默认抽取的题数
+VARIANT_PER_SHEET = 5
+
+# 保存的勾选、分值和环境设置方案
+PROFILE_FILE = "profiles.json"
@@ -0,0 +1,144 @@
+import os
+import subprocess
+import threading
+import time
+
+import tracing
+from settings import *
+
+
+def fileMtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+# 管理单个外部程序：防止重复启动、检测就绪、异常退出后自动重启
+class ManagedProcess:
+    def __init__(self, name, command, readyMarker=None, readyFile=None, maxRestarts=PROCESS_MAX_RESTARTS,
+                 onEvent=None, cwd=None):
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.readyMarker = readyMarker or None
+        self.readyFile = readyFile or None
+        self.maxRestarts = maxRestarts
+        self.onEvent = onEvent
+        self.process = None
+        self.state = 'stopped'
+        self.launchTime = None
+        self.readyLatency = None
+        self.restarts = 0
+        self.stopping = False
+        self.lock = threading.RLock()
+
+    def emit(self, event, detail=None):
+        if self.onEvent is not None:
+            self.onEvent(self.name, event, detail)
+
+    def available(self):
+        executable = self.command if isinstance(self.command, str) else self.command[0]
+        return bool(executable) and os.path.exists(executable)
+
+    def isRunning(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        with self.lock:
+            if self.isRunning():
+                return False
+            self.stopping = False
+            self.restarts = 0
+            self.launch()
+        return True
+
+    def launch(self):
+        # 就绪文件在启动前已存在时，只有修改时间变化才算就绪
+        staleMtime = fileMtime(self.readyFile) if self.readyFile else None
+        capture = subprocess.PIPE if self.readyMarker else None
+        with tracing.span('launchProcess', process=self.name, restart=self.restarts):
+            self.launchTime = time.perf_counter()
+            self.process = subprocess.Popen(self.command, cwd=self.cwd, stdout=capture,
+                                            stderr=subprocess.STDOUT if capture else None,
+                                            text=bool(capture), errors='replace' if capture else None)
+        self.state = 'starting'
+        self.readyLatency = None
+        self.emit('starting', self.process.pid)
+        threading.Thread(target=self.monitor, args=(self.process, staleMtime), daemon=True).start()
+
+    def markReady(self, process):
+        with self.lock:
+            if process is not self.process or self.state != 'starting':
+                return
+            self.state = 'ready'
+            self.readyLatency = time.perf_counter() - self.launchTime
+        tracing.record('processReady', self.readyLatency, process=self.name)
+        self.emit('ready', self.readyLatency)
+
+    def watchFile(self, process, staleMtime):
+        while process.poll() is None and process is self.process and self.state == 'starting':
+            mtime = fileMtime(self.readyFile)
+            if mtime is not None and mtime != staleMtime:
+                self.markReady(process)
+                return
+            time.sleep(0.1)
+
+    def monitor(self, process, staleMtime):
+        if self.readyMarker is None and self.readyFile is None:
+            self.markReady(process)
+        if self.readyFile is not None:
+            threading.Thread(target=self.watchFile, args=(process, staleMtime), daemon=True).start()
+        if self.readyMarker is not None:
+            # 持续读取输出，避免管道写满阻塞子进程
+            for line in process.stdout:
+                if self.readyMarker in line:
+                    self.markReady(process)
+        code = process.wait()
+
+        with self.lock:
+            if process is not self.process:
+                return
+            if self.stopping or code == 0:
+                self.state = 'stopped'
+                restart = False
+            else:
+                self.state = 'crashed'
+                restart = self.restarts < self.maxRestarts
+        self.emit('exited' if self.state == 'stopped' else 'crashed', code)
+
+        if restart:
+            with self.lock:
+                if process is self.process and not self.stopping:
+                    self.restarts += 1
+                    self.launch()
+
+    def stop(self, timeout=5):
+        with self.lock:
+            self.stopping = True
+            process = self.process
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+class Supervisor:
+    def __init__(self, onEvent=None, stations=()):
+        self.tracker = ManagedProcess('tracker', TRACKER_APPLICATION, TRACKER_READY_MARKER, TRACKER_READY_FILE,
+                                      onEvent=onEvent)
+        self.unreal = ManagedProcess('unreal', UNREAL_APPLICATION, UNREAL_READY_MARKER, UNREAL_READY_FILE,
+                                     onEvent=onEvent)
+        # 每个工位的模拟器在各自的输出目录中运行，就绪文件也相对于该目录
+        self.stations = {}
+        for station in stations:
+            readyFile = os.path.join(station['folder'], UNREAL_READY_FILE) if UNREAL_READY_FILE else None
+            self.stations[station['name']] = ManagedProcess(station['name'], station['application'],
+                                                            UNREAL_READY_MARKER, readyFile, onEvent=onEvent,
+                                                            cwd=station['folder'])
+
+    def stopAll(self):
+        for process in (self.tracker, self.unreal, *self.stations.values()):
+            process.stop()
@@ -0,0 +1,285 @@
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+import main
+from bank import mergeSheets, readLevel, readLevelFull
+from profiles import encodeProfile, profileSelection
+from results import RESULT_FORMATS, decodeResult, encodeResult
+from session import DEFAULT_SETTINGS, encodeTime, questionRows, writeSession
+from settings import *
+from supervisor import ManagedProcess
+from variants import applyVariant
+
+# 替代外部程序的脚本：ready 模式延迟后输出就绪文本并保持运行，crash 模式立即以非零码退出
+STUB = '''import sys, time
+mode = sys.argv[1]
+if mode == 'ready':
+    time.sleep(0.2)
+    print('STUB READY', flush=True)
+    time.sleep(5)
+elif mode == 'crash':
+    sys.exit(3)
+else:
+    time.sleep(5)
+'''
+
+
+def waitFor(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class SupervisorTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.stub = os.path.join(self.folder.name, 'stub.py')
+        with open(self.stub, 'w', encoding='UTF-8') as stubFile:
+            stubFile.write(STUB)
+        self.events = []
+        self.eventLock = threading.Lock()
+        self.processes = []
+
+    def tearDown(self):
+        for process in self.processes:
+            process.stop()
+        self.folder.cleanup()
+
+    def onEvent(self, name, event, detail):
+        with self.eventLock:
+            self.events.append((event, detail))
+
+    def eventNames(self):
+        with self.eventLock:
+            return [event for event, _ in self.events]
+
+    def managed(self, mode, readyMarker=None, maxRestarts=0):
+        process = ManagedProcess('stub', [sys.executable, self.stub, mode], readyMarker, None, maxRestarts,
+                                 self.onEvent)
+        self.processes.append(process)
+        return process
+
+    def testDuplicateStart(self):
+        process = self.managed('idle')
+        self.assertTrue(process.start())
+        pid = process.process.pid
+        self.assertFalse(process.start())
+        self.assertEqual(process.process.pid, pid)
+        self.assertEqual(self.eventNames().count('starting'), 1)
+
+    def testReadyMarker(self):
+        process = self.managed('ready', readyMarker='STUB READY')
+        process.start()
+        self.assertTrue(waitFor(lambda: process.state == 'ready'))
+        self.assertGreaterEqual(process.readyLatency, 0.2)
+        self.assertIn(('ready', process.readyLatency), self.events)
+
+    def testCrashRestartsUpToLimit(self):
+        process = self.managed('crash', maxRestarts=2)
+        process.start()
+        self.assertTrue(waitFor(lambda: self.eventNames().count('crashed') == 3))
+        time.sleep(0.5)
+        self.assertEqual(self.eventNames().count('starting'), 3)
+        self.assertEqual(self.eventNames().count('crashed'), 3)
+        self.assertEqual(process.restarts, 2)
+        self.assertEqual(process.state, 'crashed')
+        self.assertFalse(process.isRunning())
+
+
+class ReadLevelTest(unittest.TestCase):
+    def testMatchesReadExcel(self):
+        import openpyxl
+
+        workbook = openpyxl.Workbook()
+        content = workbook.active
+        content.title = 'Content'
+        for row in (('id', 'Content', 'Extra'), (None, '首个 id 之前', 1), (101, 'x', None), (None, 'y', None),
+                    (None, None, None), ('b', None, 2), (103.0, 'z', None), (None, None, None)):
+            content.append(row)
+        question = workbook.create_sheet('Question')
+        for row in (('id', 'Question'), (None, '首个 id 之前'), (5, 'p1'), (None, 'p2'), ('a', 'q'),
+                    (2.0, 'r1'), (None, 'r2'), (None, 'r3')):
+            question.append(row)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'Level.xlsx')
+            workbook.save(path)
+            full = readLevelFull(path)
+            streamed = readLevel(path)
+        self.assertEqual(list(streamed), list(full))
+        self.assertEqual(questionRows([streamed]), questionRows([full]))
+        self.assertEqual(streamed['Question']['Question'].tolist(), full['Question']['Question'].tolist())
+
+
+class ResultFormatTest(unittest.TestCase):
+    DATA = {'metadata': {'trainer': '学员'}, 'answers': [{'question_id': 'q1', 'user_answer': ['A', 'B'], 'score': 5}]}
+
+    def testRoundTrip(self):
+        for format in RESULT_FORMATS:
+            self.assertEqual(decodeResult(encodeResult(self.DATA, format)), self.DATA, format)
+
+    def testDetectWithoutBom(self):
+        text = ' \r\n' + json.dumps(self.DATA, ensure_ascii=False)
+        for encoding in ('UTF-16-LE', 'UTF-16-BE', 'UTF-8'):
+            self.assertEqual(decodeResult(text.encode(encoding)), self.DATA, encoding)
+        self.assertEqual(decodeResult(b' \x00{\x00}\x00'), {})
+        self.assertEqual(decodeResult(gzip.compress(text.encode('UTF-8'))), self.DATA)
+
+    def testUnknownFormat(self):
+        with self.assertRaises(ValueError):
+            decodeResult(b'\x00\x00garbage')
+
+
+class WriteSessionTest(unittest.TestCase):
+    OUTPUTS = (BINARY_OUTPUT, NAME_OUTPUT, YAML_OUTPUT, QUESTION1_OUTPUT)
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.rows = [('q1', '10'), ('q2', '20')]
+
+    def export(self, name, progress=None):
+        return writeSession(self.folder.name, encodeTime(6, 45), 0, 300, name, dict(DEFAULT_SETTINGS), self.rows,
+                            progress)
+
+    def manifest(self):
+        with open(os.path.join(self.folder.name, MANIFEST_OUTPUT), 'r', encoding='UTF-8') as manifestFile:
+            return json.load(manifestFile)
+
+    def backdate(self):
+        # 把输出文件的修改时间改到过去，重写过的文件一定能被发现
+        mtimes = {}
+        for output in self.OUTPUTS:
+            path = os.path.join(self.folder.name, output)
+            os.utime(path, ns=(10 ** 18, 10 ** 18))
+            mtimes[output] = os.stat(path).st_mtime_ns
+        return mtimes
+
+    def testOnlyChangedFilesRewritten(self):
+        self.assertTrue(self.export('学员甲'))
+        first = self.manifest()
+        self.assertEqual(sorted(first['changed']), sorted(self.OUTPUTS))
+        mtimes = self.backdate()
+
+        self.assertTrue(self.export('学员乙'))
+        second = self.manifest()
+        self.assertEqual(second['changed'], [NAME_OUTPUT])
+        self.assertEqual(second['generation'], first['generation'] + 1)
+        for output in self.OUTPUTS:
+            mtime = os.stat(os.path.join(self.folder.name, output)).st_mtime_ns
+            if output == NAME_OUTPUT:
+                self.assertNotEqual(mtime, mtimes[output])
+            else:
+                self.assertEqual(mtime, mtimes[output], output)
+
+    def testCancelLeavesManifest(self):
+        self.assertTrue(self.export('学员甲'))
+        with open(os.path.join(self.folder.name, MANIFEST_OUTPUT), 'rb') as manifestFile:
+            before = manifestFile.read()
+        self.assertFalse(self.export('学员乙', lambda done, total: done < 2))
+        with open(os.path.join(self.folder.name, MANIFEST_OUTPUT), 'rb') as manifestFile:
+            self.assertEqual(manifestFile.read(), before)
+
+
+class MergeSheetsTest(unittest.TestCase):
+    def sheet(self, ids, required, scores, contents):
+        import pandas as pd
+
+        return pd.DataFrame({'required': required, 'score': scores,
+                             'id': pd.Series(ids, dtype=object), 'Content': contents})
+
+    def testDuplicateIdsKeepRowSelections(self):
+        old = self.sheet(['a', 'a', 'b'], [True, False, True], [10, 20, 30], ['x', 'y', 'z'])
+        new = self.sheet(['a', 'a', 'b', 'c'], True, 10, ['x', 'y2', 'z', 'w'])
+        merged, changed = mergeSheets({'S': old}, {'S': new})
+        self.assertEqual(changed, ['S'])
+        self.assertEqual(merged['S']['required'].tolist(), [True, False, True, True])
+        self.assertEqual(merged['S']['score'].tolist(), [10, 20, 30, 10])
+
+
+class ProfileTest(unittest.TestCase):
+    def testRoundTrip(self):
+        import numpy as np
+        import pandas as pd
+
+        # 首行没有 id，a 出现两次，勾选和分值各不相同
+        df = pd.DataFrame({'required': [True, True, False, True], 'score': [10, 10, 20, 30],
+                           'id': pd.Series([np.nan, 'a', 'a', 'b'], dtype=object), 'Content': list('wxyz')})
+        levels = [{'S': df}]
+        expected = questionRows(levels)
+        profile = json.loads(json.dumps(encodeProfile(levels, {})))
+        df['required'] = False
+        df['score'] = DEFAULT_SCORE
+
+        selection, added, removed = profileSelection(profile, levels)
+        applyVariant(levels, selection)
+        self.assertEqual((added, removed), (0, 0))
+        self.assertEqual(questionRows(levels), expected)
+        self.assertEqual(df['score'].tolist(), [10, 10, 20, 30])
+
+
+class StationExportTest(unittest.TestCase):
+    def setUp(self):
+        # 在临时目录中运行：题库和结果目录指向不存在的路径，缓存、索引等相对路径的文件也写在临时目录
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.folder.name)
+        paths = {f'LEVEL_{level}_EXCEL': os.path.join(self.folder.name, f'Level-{level}.xlsx') for level in (1, 2, 3, 4)}
+        paths['RESULT_FOLDER'] = os.path.join(self.folder.name, 'results')
+        patcher = mock.patch.multiple(main, **paths)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # 工位模拟器的替身：在工作目录中记录启动后保持运行
+        self.stub = os.path.join(self.folder.name, 'sim.py')
+        with open(self.stub, 'w', encoding='UTF-8') as stubFile:
+            stubFile.write("import time\nopen('started.txt', 'w').close()\ntime.sleep(5)\n")
+        self.stations = [{'name': f'工位{index}', 'folder': os.path.join(self.folder.name, f'station{index}'),
+                          'application': [sys.executable, self.stub], 'trainee': f'学员{index}'} for index in (1, 2)]
+        self.app = QApplication.instance() or QApplication([])
+        self.window = main.MainWindow(stations=self.stations)
+        self.addCleanup(self.window.close)
+        self.addCleanup(self.window.supervisor.stopAll)
+
+    def export(self):
+        self.window.okButtonClicked()
+        self.assertTrue(waitFor(lambda: self.app.processEvents() or self.window.exportFuture is None))
+        return self.window.exportLabel.text()
+
+    def testExportAndLaunch(self):
+        self.assertEqual(set(self.window.supervisor.stations), {'工位1', '工位2'})
+        self.assertEqual(self.export(), '已导出')
+        for station in self.stations:
+            folder = station['folder']
+            with open(os.path.join(folder, NAME_OUTPUT), 'r') as nameFile:
+                self.assertEqual(nameFile.read().strip(), station['trainee'])
+            for output in (BINARY_OUTPUT, QUESTION1_OUTPUT, YAML_OUTPUT, MANIFEST_OUTPUT):
+                self.assertTrue(os.path.exists(os.path.join(folder, output)))
+            self.assertTrue(waitFor(lambda: os.path.exists(os.path.join(folder, 'started.txt'))))
+            self.assertTrue(self.window.supervisor.stations[station['name']].isRunning())
+            self.assertTrue(self.window.stationStatus[station['name']].startswith('已导出'))
+
+        # 再次导出时已运行的模拟器不会重复启动
+        pids = {name: process.process.pid for name, process in self.window.supervisor.stations.items()}
+        self.assertEqual(self.export(), '已导出')
+        for name, process in self.window.supervisor.stations.items():
+            self.assertEqual(process.process.pid, pids[name])
+            self.assertTrue(self.window.stationStatus[name].endswith('已在运行'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import collections
+import json
+import os
+import threading
+import time
+
+from settings import *
+
+# 设置 TRACE_ENABLED 或环境变量 STARTER_TRACE=1 启用；未启用时 span 直接返回空对象
+ENABLED = TRACE_ENABLED or os.environ.get('STARTER_TRACE', '') not in ('', '0')
+recent = collections.deque(maxlen=TRACE_RECENT)
+lock = threading.Lock()
+
+
+class Span:
+    def __init__(self, name, sizes):
+        self.name = name
+        self.sizes = sizes
+        self.start = None
+
+    def set(self, **sizes):
+        self.sizes.update(sizes)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, exc, traceback):
+        sizes = dict(self.sizes)
+        if excType is not None:
+            sizes['error'] = excType.__name__
+        record(self.name, time.perf_counter() - self.start, **sizes)
+        return False
+
+
+class NoopSpan:
+    def set(self, **sizes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, traceback):
+        return False
+
+
+NOOP_SPAN = NoopSpan()
+
+
+def span(name, **sizes):
+    if not ENABLED:
+        return NOOP_SPAN
+    return Span(name, sizes)
+
+
+def record(name, duration, **sizes):
+    if not ENABLED:
+        return
+    entry = {
+        'name': name,
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'duration': round(duration, 6),
+        'thread': threading.current_thread().name,
+        'pid': os.getpid()
+    }
+    entry.update(sizes)
+    with lock:
+        recent.append(entry)
+        try:
+            # 日志超过上限时滚动为 .1 文件
+            if os.path.exists(TRACE_LOG) and os.path.getsize(TRACE_LOG) > TRACE_LOG_MAX_BYTES:
+                os.replace(TRACE_LOG, TRACE_LOG + '.1')
+            with open(TRACE_LOG, 'a', encoding='UTF-8') as logFile:
+                logFile.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except OSError:
+            pass
+
+
+def recentEntries():
+    # 本进程最近的记录，诊断页直接读取内存而不重新解析日志；进程池中的记录只写入日志文件
+    with lock:
+        return list(recent)
+
+
+def summarize(entries):
+    durations = {}
+    for entry in entries:
+        durations.setdefault(entry['name'], []).append(entry['duration'])
+    summary = {}
+    for name, values in durations.items():
+        values.sort()
+        summary[name] = (len(values),
+                         values[max(0, -(-len(values) * 50 // 100) - 1)],
+                         values[max(0, -(-len(values) * 95 // 100) - 1)])
+    return summary
@@ -0,0 +1,118 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from session import writeQuestionRows
+from settings import *
+
+
+def drawIds(rng, weights, perSheet):
+    # 在去重后的 id 中不放回地抽取 perSheet 个，返回抽中的 id 编号和各自的分值
+    k = min(perSheet, len(weights))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    chosen = np.sort(np.argpartition(rng.random(len(weights)), k - 1)[:k]) if k < len(weights) \
+        else np.arange(len(weights))
+
+    # 按基准分值比例缩放到统一的总分，取整误差按小数部分从大到小补齐，保证每套总分相同
+    target = int(round(weights.mean() * k))
+    chosenWeights = weights[chosen].astype(float)
+    if chosenWeights.sum() <= 0:
+        chosenWeights = np.ones(k)
+    scaled = chosenWeights * target / chosenWeights.sum()
+    scores = np.floor(scaled).astype(np.int64)
+    remainder = target - scores.sum()
+    scores[np.argsort(scores - scaled, kind='stable')[:remainder]] += 1
+    return chosen, scores
+
+
+class VariantSet:
+    def __init__(self, levels, perSheet, seed=0, weights=None):
+        # 抽题和分值只取决于种子、题数、套序号和基准分值（默认 DEFAULT_SCORE，或按 id 指定），与当前的勾选和分值无关
+        import pandas as pd
+
+        weights = weights or {}
+        self.perSheet = perSheet
+        self.seed = seed
+        self.sheets = []
+        for level, sheets in enumerate(levels, 1):
+            if sheets is None:
+                continue
+            for ordinal, (name, df) in enumerate(sheets.items()):
+                # 同一 id 的多行（Content 表中向下填充的 id）作为一道题，缺失的 id 编号为 -1
+                codes, uniques = pd.factorize(df['id'])
+                ids = [str(value) for value in uniques]
+                base = np.array([weights.get(id, DEFAULT_SCORE) for id in ids], dtype=np.int64)
+                self.sheets.append(((level, name), level, ordinal, codes, ids, base))
+
+    def draws(self, index):
+        # 每个工作表的第 index 套使用由种子、关卡、工作表序号和套序号派生的独立随机流，只抽取需要的那一套
+        for key, level, ordinal, codes, ids, base in self.sheets:
+            rng = np.random.default_rng([self.seed, level, ordinal, index])
+            yield key, codes, ids, base, drawIds(rng, base, self.perSheet)
+
+    def variant(self, index):
+        # 返回每个工作表的勾选掩码和分值，抽中 id 的所有行一起勾选，其余行使用基准分值
+        variant = {}
+        for key, codes, ids, base, (chosen, scores) in self.draws(index):
+            selected = np.zeros(len(ids) + 1, dtype=bool)
+            selected[chosen] = True
+            idScores = np.append(base, DEFAULT_SCORE)
+            idScores[chosen] = scores
+            variant[key] = (selected[codes], idScores[codes])
+        return variant
+
+    def totals(self, count):
+        # 按去重后的 id 计算每套的总分
+        return np.array([sum(int(scores.sum()) for *_, (_, scores) in self.draws(index))
+                         for index in range(count)], dtype=np.int64)
+
+    def rows(self, index):
+        # 与 questionRows 相同的顺序和格式，可直接写入 questions.csv
+        rows = []
+        for _, codes, ids, _, (chosen, scores) in self.draws(index):
+            idScores = dict(zip(chosen.tolist(), scores.tolist()))
+            rows.extend((ids[code], str(idScores[code])) for code in codes.tolist() if code in idScores)
+        return rows
+
+
+def applyVariant(levels, variant, models=None):
+    # 已创建表格的工作表通过模型整体更新，其余直接写入 DataFrame
+    for (level, name), (mask, scores) in variant.items():
+        model = models.get((level, name)) if models is not None else None
+        if model is not None:
+            model.setSelection(mask, scores)
+        else:
+            df = levels[level - 1][name]
+            df['required'] = mask.copy()
+            df['score'] = scores.copy()
+
+
+if __name__ == '__main__':
+    from bank import BankCache
+    from regrade import readWeights
+
+    parser = argparse.ArgumentParser(description='随机生成多套题目组合')
+    parser.add_argument('-k', '--per-sheet', type=int, default=VARIANT_PER_SHEET, help='每个工作表抽取的题数')
+    parser.add_argument('-n', '--count', type=int, default=100, help='生成的套数')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-w', '--weights', help='按 questions.csv 格式指定各题的基准分值')
+    parser.add_argument('-o', '--output', help='每套写入一个子目录中的 questions.csv')
+    args = parser.parse_args()
+
+    cache = BankCache()
+    levels = [cache.load(excel) if os.path.exists(excel) else None
+              for excel in (LEVEL_1_EXCEL, LEVEL_2_EXCEL, LEVEL_3_EXCEL, LEVEL_4_EXCEL)]
+    variants = VariantSet(levels, args.per_sheet, args.seed, readWeights(args.weights) if args.weights else None)
+    start = time.perf_counter()
+    totals = variants.totals(args.count)
+    elapsed = time.perf_counter() - start
+    print(f'生成 {args.count} 套，用时 {elapsed * 1000:.1f} ms；每套总分 {totals.min(initial=0)}~{totals.max(initial=0)}')
+
+    if args.output:
+        for index in range(args.count):
+            folder = os.path.join(args.output, f'variant_{index + 1:03d}')
+            os.makedirs(folder, exist_ok=True)
+            writeQuestionRows(variants.rows(index), os.path.join(folder, QUESTION1_OUTPUT))